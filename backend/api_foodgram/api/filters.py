@@ -1,13 +1,41 @@
-from django_filters.rest_framework import CharFilter, FilterSet, NumberFilter
+from django import forms
+from django.db.models import Count, Exists, OuterRef
+from django_filters.rest_framework import (BaseInFilter, CharFilter,
+                                           FilterSet,
+                                           ModelMultipleChoiceFilter,
+                                           NumberFilter)
+from rest_framework.filters import OrderingFilter
 
-from recipe.models import Recipe, Ingredients
+from recipe.models import Ingredients, IngredientsAmount, Recipe, Tag
+from recipe.search import SEARCH_RANK, search_recipes
+
+
+class IntegerFilter(NumberFilter):
+    """Целое число: NumberFilter принимает Decimal и 1.9 стало бы 1."""
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(BaseInFilter, IntegerFilter):
+    """Список целых id через запятую: ?ingredients=1,5,9."""
 
 
 class RecipeFilter(FilterSet):
-    """Фильтр для рецептов по тегам, избранному и списку покупок."""
+    """
+    Фильтр для рецептов по тегам, избранному, списку покупок
+    и ингредиентам.
+    """
     is_favorited = NumberFilter(method='filter_is_favorited', )
-    tags = CharFilter(field_name='tags__slug', method='filter_tags')
+    tags = ModelMultipleChoiceFilter(
+        field_name='tags__slug',
+        to_field_name='slug',
+        queryset=Tag.objects.all(),
+        method='filter_tags'
+    )
     is_in_shopping_cart = NumberFilter(method='filter_is_in_shopping_cart', )
+    search = CharFilter(method='filter_search')
+    ingredients = IntegerInFilter(method='filter_ingredients')
+    exclude_ingredients = IntegerInFilter(method='filter_exclude_ingredients')
+    can_cook = NumberFilter(method='filter_can_cook')
 
     class Meta:
         model = Recipe
@@ -19,13 +47,78 @@ class RecipeFilter(FilterSet):
         return queryset
 
     def filter_tags(self, queryset, name, value):
-        return queryset.filter(tags__slug=value)
+        """
+        Рецепты хотя бы с одним из тегов ?tags=a&tags=b.
+        Один подзапрос Exists вместо join, поэтому без дублей.
+        """
+        if not value:
+            return queryset
+        return queryset.annotate(
+            has_tags=Exists(Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'),
+                tag__in=value
+            ))
+        ).filter(has_tags=True)
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
             return queryset.filter(in_shopping_cart__user=self.request.user.id)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_ingredients(self, queryset, name, value):
+        """
+        Рецепты со всеми ингредиентами из списка, а при ?can_cook=1
+        рецепты, которые можно приготовить только из них.
+        """
+        ids = set(value)
+        with_any = IngredientsAmount.objects.filter(ingredients__in=ids)
+        if self.form.cleaned_data.get('can_cook'):
+            return queryset.filter(
+                pk__in=with_any.values('recipe')
+            ).annotate(
+                needs_other=Exists(IngredientsAmount.objects.filter(
+                    recipe=OuterRef('pk')
+                ).exclude(ingredients__in=ids))
+            ).filter(needs_other=False)
+        return queryset.filter(
+            pk__in=with_any.values('recipe').annotate(
+                found=Count('ingredients', distinct=True)
+            ).filter(found=len(ids)).values('recipe')
+        )
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        return queryset.exclude(
+            pk__in=IngredientsAmount.objects.filter(
+                ingredients__in=set(value)
+            ).values('recipe')
+        )
+
+    def filter_can_cook(self, queryset, name, value):
+        """Режим учитывается в filter_ingredients."""
+        return queryset
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """
+    Сортировка рецептов по счетчикам популярности.
+    Последним ключом всегда идет -pk, чтобы страницы
+    с одинаковыми счетчиками не перемешивались.
+    Без явного ?ordering результаты поиска идут по релевантности.
+    """
+    def get_ordering(self, request, queryset, view):
+        if (
+            not request.query_params.get(self.ordering_param)
+            and SEARCH_RANK in queryset.query.annotations
+        ):
+            return (f'-{SEARCH_RANK}', '-pk')
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'pk', '-pk'} & set(ordering):
+            ordering = (*ordering, '-pk')
+        return ordering
+
 
 class IngredientsFilter(FilterSet):
     """Фильтр для поиска ингредиентов."""
@@ -38,7 +131,6 @@ class IngredientsFilter(FilterSet):
         }
 
     def search_ingredient(self, queryset, name, value):
-        print(value)
         if not value:
             return queryset
-        return queryset.filter(name__startswith=value)
+        return queryset.filter(name__istartswith=value)
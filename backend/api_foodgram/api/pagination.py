@@ -1,9 +1,105 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 from api_foodgram import settings
+from recipe.feed import feed_recipe_ids
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     """Пагинатор переопределенный по ТЗ"""
     page_size_query_param = 'limit'
     page_size = settings.NUM_PAG_IN_PAGE
+    max_page_size = settings.MAX_PAG_IN_PAGE
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по -pk: без COUNT(*) и OFFSET,
+    следующая страница выбирается по индексу первичного ключа.
+    """
+    ordering = '-pk'
+    page_size_query_param = 'limit'
+    page_size = settings.NUM_PAG_IN_PAGE
+    max_page_size = settings.MAX_PAG_IN_PAGE
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Курсорная пагинация ленты подписок по -pk. Порядок закреплен
+    и не зависит от ?ordering. Страница собирается из id, которые
+    feed_recipe_ids выбирает по ключу из каждого источника ленты,
+    ссылки next и previous строит CursorPagination.
+    """
+
+    def paginate_feed(self, queryset, user, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = (self.ordering,)
+        self.cursor = self.decode_cursor(request)
+        reverse, current_position = (
+            (False, None) if self.cursor is None
+            else (self.cursor.reverse, self.cursor.position)
+        )
+        try:
+            ids = feed_recipe_ids(
+                user,
+                self.page_size + 1,
+                None if current_position is None else int(current_position),
+                reverse
+            )
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        recipes = queryset.in_bulk(ids[:self.page_size])
+        self.page = [
+            recipes[pk] for pk in sorted(recipes, reverse=True)
+        ]
+        has_following_position = len(ids) > self.page_size
+        following_position = (
+            str(ids[-1]) if has_following_position else None
+        )
+        if reverse:
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+        self.display_page_controls = self.has_previous or self.has_next
+        return self.page
+
+
+class LimitPageOrCursorPagination(LimitPageNumberPagination):
+    """
+    Постраничная пагинация по ТЗ, с переходом на курсорную
+    по запросу клиента: ?pagination=cursor для первой страницы,
+    дальше по ссылкам next/previous с параметром cursor.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = KeysetPagination
+    cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+            or request.query_params.get(
+                self.mode_query_param
+            ) == self.cursor_mode
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_pagination_class()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is None:
+            return super().get_paginated_response(data)
+        return self.cursor_paginator.get_paginated_response(data)
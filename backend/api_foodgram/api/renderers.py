@@ -0,0 +1,33 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class PlainTextRenderer(BaseRenderer):
+    """
+    Рендерер для выгрузки списка покупок в txt.
+    Сам файл отдается потоком мимо рендерера, оповещения
+    view отдает в JSON, здесь выводятся только ошибки DRF.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = '\n'.join(
+                f'{key}: {value}' for key, value in data.items()
+            )
+        return str(data).encode(self.charset)
+
+
+class CSVRenderer(PlainTextRenderer):
+    """Рендерер для выгрузки списка покупок в csv."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(PlainTextRenderer):
+    """Рендерер для выгрузки списка покупок в pdf."""
+    media_type = 'application/pdf'
+    format = 'pdf'
@@ -1,16 +1,22 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api_foodgram import settings
+from recipe.images import build_image_variants
 from recipe.models import (Favorite, Ingredients, IngredientsAmount, Recipe,
-                           ShoppingCart, Tag)
+                           ShoppingCart, ShoppingCartTotal, Tag)
+from recipe.similarity import refresh_similar_recipes
+from recipe.workers import run_in_background
 from users.serializers import UserSerializer
 
 
 COOKING_TIME_VALIDATION = 'Время не может быть меньше 0'
 VAL_NOT_ZERO = 'Убедитесь, что значение количества ингредиента больше 0'
 VAL_NOT_INT = 'Убедитесь, что значение ингредиента число.'
+MISSING_IDS = 'Не найдены объекты с id: {}'
 HEX_LEN_NUMBERS = 7
 
 
@@ -89,6 +95,7 @@ class RecipesListSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     text = serializers.CharField(source='description', read_only=True)
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -101,6 +108,7 @@ class RecipesListSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'images',
             'text',
             'cooking_time',
         )
@@ -111,7 +119,28 @@ class RecipesListSerializer(serializers.ModelSerializer):
             ),
         ]
 
+    def to_representation(self, instance):
+        author_is_subscribed = getattr(instance, 'author_is_subscribed', None)
+        if instance.author is not None and author_is_subscribed is not None:
+            instance.author.is_subscribed = author_is_subscribed
+        return super().to_representation(instance)
+
+    def get_images(self, obj):
+        """Ссылки на готовые уменьшенные копии текущего изображения."""
+        request = self.context.get('request')
+        return {
+            variant.kind: (
+                request.build_absolute_uri(variant.image.url)
+                if request else variant.image.url
+            )
+            for variant in obj.image_variants.all()
+            if variant.source == obj.image.name
+        }
+
     def get_is_favorited(self, obj):
+        is_favorited = getattr(obj, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -119,6 +148,9 @@ class RecipesListSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
         user = self.context['request'].user
         return (
             user.is_authenticated
@@ -132,9 +164,9 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         read_only=True, slug_field='username',
         default=serializers.CurrentUserDefault()
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all(),
+    tags = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        write_only=True,
     )
     ingredients = serializers.SerializerMethodField(error_messages={'Ошибка': VAL_NOT_ZERO})
     image = Base64ImageField()
@@ -170,25 +202,21 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return ingredient_list
 
     def teg_ing_for_create_and_update(self, recipe, data):
-        tags_list = []
-        tags = data.pop('tags')
-        ingredients = data.pop('ingredients')
-        for tag in tags:
-            current_tag = get_object_or_404(Tag, pk=tag.pk)
-            tags_list.append(current_tag)
-        recipe.tags.set(tags_list)
-        objects = (
+        """
+        Теги и ингредиенты уже проверены в validate,
+        поэтому записываются по id без дополнительных запросов.
+        """
+        recipe.tags.set(data.pop('tags'))
+        IngredientsAmount.objects.bulk_create(
             IngredientsAmount(
                 recipe=recipe,
-                ingredients=get_object_or_404(
-                    Ingredients,
-                    pk=recipe_ingredient['id']),
+                ingredients_id=recipe_ingredient['id'],
                 amount=recipe_ingredient['amount']
-            ) for recipe_ingredient in ingredients
+            ) for recipe_ingredient in data.pop('ingredients')
         )
-        IngredientsAmount.objects.bulk_create(objects)
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         data = {}
         data['tags'] = validated_data.pop('tags')
@@ -196,28 +224,86 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         return self.teg_ing_for_create_and_update(recipe, data)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        instance.ingredients.clear()
-        instance.name = validated_data.get(
-            'name',
-            instance.name
+        """
+        Обновление по разнице со старым состоянием: меняются только
+        отличающиеся теги, ингредиенты и поля рецепта.
+        """
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            instance.tags.set(tags)
+        removed, written = self.update_ingredients(
+            instance, validated_data.pop('ingredients')
         )
-        instance.image = validated_data.get(
-            'image',
-            instance.image
-        )
-        instance.description = validated_data.get(
-            'description',
-            instance.description
-        )
-        instance.cooking_time = validated_data.get(
-            'cooking_time',
-            instance.cooking_time
-        )
-        instance.save()
-        instance = self.teg_ing_for_create_and_update(instance, validated_data)
-        return super().update(instance, validated_data)
+        if written:
+            ShoppingCartTotal.objects.refresh_for_recipe(instance, written)
+        if removed or written:
+            run_in_background(refresh_similar_recipes, instance.pk)
+        changed_fields = [
+            field for field, value in validated_data.items()
+            if self.field_changed(instance, field, value)
+        ]
+        for field in changed_fields:
+            setattr(instance, field, validated_data[field])
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
+        if 'image' in changed_fields:
+            run_in_background(build_image_variants, instance.pk)
+        return instance
+
+    def field_changed(self, instance, field, value):
+        """
+        Отличается ли новое значение поля от сохраненного. Изображение
+        хранится по хэшу содержимого, поэтому загруженный файл сравнивается
+        с текущим по имени, под которым его сохранило бы хранилище.
+        """
+        if field != 'image':
+            return getattr(instance, field) != value
+        image = Recipe._meta.get_field('image')
+        return image.storage.content_name(
+            image.generate_filename(instance, value.name), value
+        ) != instance.image.name
+
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Удаление убранных, вставка новых и обновление измененных
+        количеств ингредиентов. Возвращает id удаленных ингредиентов
+        и id записанных пакетно: bulk_create и bulk_update не шлют
+        сигналов, поэтому сводный список покупок по ним пересчитывается
+        явно, а по удаленным - сигналом post_delete.
+        """
+        current = {
+            amount.ingredients_id: amount
+            for amount in recipe.ingredientsamount_set.all()
+        }
+        new = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - new.keys()
+        added = new.keys() - current.keys()
+        changed = [
+            amount for ingredient_id, amount in current.items()
+            if ingredient_id in new and amount.amount != new[ingredient_id]
+        ]
+        for amount in changed:
+            amount.amount = new[amount.ingredients_id]
+        if removed:
+            IngredientsAmount.objects.filter(
+                pk__in=[current[ingredient_id].pk for ingredient_id in removed]
+            ).delete()
+        if added:
+            IngredientsAmount.objects.bulk_create(
+                IngredientsAmount(
+                    recipe=recipe,
+                    ingredients_id=ingredient_id,
+                    amount=new[ingredient_id]
+                ) for ingredient_id in added
+            )
+        if changed:
+            IngredientsAmount.objects.bulk_update(changed, ('amount',))
+        return removed, added | {amount.ingredients_id for amount in changed}
 
     def validate(self, data):
         ingredients = self.initial_data.get('ingredients')
@@ -227,15 +313,41 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                     'ingredients': 'Нужен хотя бы один ингредиент для рецепта'
                 }
             )
+        try:
+            ingredients = [
+                {
+                    'id': int(ingredient_item['id']),
+                    'amount': int(ingredient_item['amount']),
+                }
+                for ingredient_item in ingredients
+            ]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError(VAL_NOT_INT)
         ingr_set = set()
         for ingredient_item in ingredients:
             ingr_set.add(ingredient_item['id'])
-            if int(ingredient_item['amount']) < 0:
+            if ingredient_item['amount'] < 0:
                 raise serializers.ValidationError(VAL_NOT_ZERO)
         if len(ingr_set) < len(ingredients):
             raise serializers.ValidationError(
                 'Ингредиенты должны быть уникальными'
             )
+        errors = {}
+        missing_ingredients = ingr_set - Ingredients.objects.in_bulk(
+            ingr_set
+        ).keys()
+        if missing_ingredients:
+            errors['ingredients'] = MISSING_IDS.format(
+                ', '.join(map(str, sorted(missing_ingredients)))
+            )
+        tags = set(data.get('tags', ()))
+        missing_tags = tags - Tag.objects.in_bulk(tags).keys()
+        if missing_tags:
+            errors['tags'] = MISSING_IDS.format(
+                ', '.join(map(str, sorted(missing_tags)))
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
         data['ingredients'] = ingredients
         return data
 
@@ -245,3 +357,12 @@ class RecipeFavoriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time',)
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетного добавления и удаления."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.MAX_PAG_IN_PAGE,
+    )
@@ -0,0 +1,107 @@
+from recipe.models import Favorite, Recipe, ShoppingCart
+from users.models import CustomUser
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+FAVORITE_BATCH_URL = '/api/recipes/favorite/'
+CART_BATCH_URL = '/api/recipes/shopping_cart/'
+
+
+class FavoriteBatchTest(FoodgramAPITestCase):
+    """Пакетные избранное и список покупок: статусы и счетчики."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.user = create_user('user')
+        cls.recipes = [
+            create_recipe(cls.author, number) for number in range(4)
+        ]
+        cls.own = create_recipe(cls.user, 'свой')
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.user)
+
+    def statuses(self, method, url, ids):
+        response = getattr(self.client, method)(
+            url, {'recipes': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item['status'] for item in response.data}
+
+    def assert_counters(self):
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                recipe.favorites_count,
+                Favorite.recipe.through.objects.filter(recipe=recipe).count()
+            )
+            self.assertEqual(
+                recipe.in_carts_count,
+                ShoppingCart.recipe.through.objects.filter(
+                    recipe=recipe
+                ).count()
+            )
+
+    def test_batch_statuses_and_counters(self):
+        first, second, third, _ = (recipe.pk for recipe in self.recipes)
+        self.client.post(f'/api/recipes/{first}/favorite/')
+        self.assertEqual(
+            self.statuses(
+                'post', FAVORITE_BATCH_URL, [first, second, self.own.pk, 999]
+            ),
+            {
+                first: 'already_added',
+                second: 'added',
+                self.own.pk: 'own_recipe',
+                999: 'not_found',
+            }
+        )
+        self.assert_counters()
+        self.assertEqual(
+            self.statuses('delete', FAVORITE_BATCH_URL, [first, third]),
+            {first: 'removed', third: 'absent'}
+        )
+        self.assert_counters()
+        self.assertEqual(
+            self.statuses('delete', FAVORITE_BATCH_URL, [first, second]),
+            {first: 'absent', second: 'removed'}
+        )
+        self.assert_counters()
+
+    def test_toggle_queries(self):
+        # Рецепт, блокировка контейнера, строка связи, счетчик, активность
+        # и для списка покупок пересчет сумм; плюс две точки сохранения.
+        recipe = self.recipes[0].pk
+        for kind, budget in (('favorite', 8), ('shopping_cart', 10)):
+            url = f'/api/recipes/{recipe}/{kind}/'
+            self.client.post(url)
+            self.client.delete(url)
+            with self.assertNumQueries(budget):
+                self.assertEqual(self.client.post(url).status_code, 201)
+            with self.assertNumQueries(budget):
+                self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assert_counters()
+
+    def test_delete_without_container(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        self.assertEqual(
+            set(self.statuses('delete', CART_BATCH_URL, ids).values()),
+            {'absent'}
+        )
+        response = self.client.delete(f'/api/recipes/{ids[0]}/shopping_cart/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+        self.assert_counters()
+
+    def test_counters_follow_user_deletion(self):
+        ids = [recipe.pk for recipe in self.recipes]
+        self.statuses('post', FAVORITE_BATCH_URL, ids)
+        self.statuses('post', CART_BATCH_URL, ids[:2])
+        self.login(create_user('reader'))
+        self.statuses('post', FAVORITE_BATCH_URL, ids[:2])
+        self.assert_counters()
+        CustomUser.objects.filter(pk=self.user.pk).delete()
+        self.assert_counters()
+        self.assertEqual(
+            Recipe.objects.get(pk=ids[0]).favorites_count, 1
+        )
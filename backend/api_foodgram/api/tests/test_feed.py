@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_foodgram import settings
+from recipe.feed import backfill_feed, clear_feed
+from recipe.models import FeedEntry, Recipe
+from users.models import Subscribe
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+FEED_URL = '/api/recipes/feed/'
+
+
+class FeedTest(FoodgramAPITestCase):
+    """
+    Лента из записей FeedEntry и рецептов популярного автора
+    листается курсором в обе стороны в порядке -pk.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, author, popular, other, fan = (
+            create_user(name)
+            for name in ('reader', 'author', 'popular', 'other', 'fan')
+        )
+        for number in range(12):
+            create_recipe(
+                (author, popular, other)[number % 3], number,
+                favorites_count=number % 4
+            )
+        Subscribe.objects.bulk_create((
+            Subscribe(user=cls.reader, author=author),
+            Subscribe(user=cls.reader, author=popular),
+            Subscribe(user=fan, author=popular),
+        ))
+        with mock.patch.object(settings, 'FEED_FANOUT_LIMIT', 1):
+            backfill_feed(cls.reader.pk, author.pk)
+        cls.expected = list(
+            Recipe.objects.filter(
+                author__in=(author, popular)
+            ).order_by('-pk').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.reader)
+        patcher = mock.patch.object(settings, 'FEED_FANOUT_LIMIT', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def walk(self, url, params, link):
+        ids, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = [recipe['id'] for recipe in response.data['results']]
+            ids = ids + page if link == 'next' else page + ids
+            pages += 1
+            if not response.data[link]:
+                return ids, pages, response
+            response = self.client.get(response.data[link])
+
+    def test_pages_follow_pk_order(self):
+        ids, pages, last = self.walk(FEED_URL, {'limit': 3}, 'next')
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+        back, _, _ = self.walk(last.data['previous'], {}, 'previous')
+        self.assertEqual(back + ids[-2:], self.expected)
+
+    def test_ordering_param_is_ignored(self):
+        ids, _, _ = self.walk(
+            FEED_URL, {'limit': 3, 'ordering': '-favorites_count'}, 'next'
+        )
+        self.assertEqual(ids, self.expected)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        self.client.get(FEED_URL)
+        counts = []
+        for limit in (2, 6):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(FEED_URL, {'limit': limit})
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class FeedSubscriptionTest(FoodgramAPITestCase):
+    """Подписка и отписка пишут и чистят ленту по id пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.author = create_user('reader'), create_user('author')
+        for number in range(3):
+            create_recipe(cls.author, number)
+
+    def feed(self):
+        return set(
+            FeedEntry.objects.filter(user=self.reader).values_list(
+                'recipe', flat=True
+            )
+        )
+
+    def test_subscribe_and_unsubscribe(self):
+        self.login(self.reader)
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(
+            self.feed(),
+            set(Recipe.objects.filter(
+                author=self.author
+            ).values_list('pk', flat=True))
+        )
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.feed(), set())
+
+    def test_helpers_take_ids(self):
+        backfill_feed(self.reader.pk, self.author.pk)
+        self.assertEqual(len(self.feed()), 3)
+        clear_feed(self.reader.pk, self.author.pk)
+        self.assertEqual(self.feed(), set())
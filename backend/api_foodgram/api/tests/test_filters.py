@@ -0,0 +1,67 @@
+from recipe.models import Ingredients, IngredientsAmount, Tag
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeFilterTest(FoodgramAPITestCase):
+    """Фильтры списка рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.tags = [
+            Tag.objects.create(name=slug, slug=slug, hex_code='#000000')
+            for slug in ('breakfast', 'lunch', 'dinner')
+        ]
+        cls.recipes = []
+        for number, tags in enumerate(((0,), (1,), (0, 1), (2,))):
+            recipe = create_recipe(author, number)
+            recipe.tags.set(cls.tags[tag] for tag in tags)
+            cls.recipes.append(recipe)
+
+    def ids(self, params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_several_tags_without_duplicates(self):
+        first, second, both, _ = (recipe.pk for recipe in self.recipes)
+        self.assertEqual(self.ids({'tags': 'breakfast'}), [both, first])
+        self.assertEqual(
+            self.ids({'tags': ['breakfast', 'lunch']}), [both, second, first]
+        )
+
+    def test_unknown_tag(self):
+        response = self.client.get(RECIPES_URL, {'tags': 'brunch'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.data)
+
+    def test_ingredient_ids_must_be_integers(self):
+        for value in ('1.9', 'a', '1,2.5'):
+            for param in ('ingredients', 'exclude_ingredients'):
+                response = self.client.get(RECIPES_URL, {param: value})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(param, response.data)
+
+    def test_ingredients(self):
+        salt, sugar = (
+            Ingredients.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар')
+        )
+        first, second, both, _ = self.recipes
+        IngredientsAmount.objects.bulk_create(
+            IngredientsAmount(recipe=recipe, ingredients=ingredient, amount=1)
+            for recipe, ingredient in (
+                (first, salt), (second, sugar), (both, salt), (both, sugar)
+            )
+        )
+        self.assertEqual(
+            self.ids({'ingredients': f'{salt.pk},{sugar.pk}'}), [both.pk]
+        )
+        self.assertEqual(
+            self.ids({'ingredients': salt.pk, 'can_cook': 1}), [first.pk]
+        )
+        self.assertNotIn(
+            both.pk, self.ids({'exclude_ingredients': sugar.pk})
+        )
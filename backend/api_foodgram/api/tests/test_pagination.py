@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import Subscribe
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+RECIPES_URL = '/api/recipes/'
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+class CursorPaginationTest(FoodgramAPITestCase):
+    """
+    ?pagination=cursor листает те же объекты в порядке -pk,
+    что и постраничный режим, но без COUNT и OFFSET.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        authors = [create_user(f'author{number}') for number in range(7)]
+        for number in range(11):
+            create_recipe(authors[number % 7], number)
+        Subscribe.objects.bulk_create(
+            Subscribe(user=cls.reader, author=author) for author in authors
+        )
+
+    def walk(self, url, params):
+        ids, queries = [], []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, queries
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(response.data['next'])
+            queries.extend(query['sql'] for query in captured)
+
+    def page_ids(self, url):
+        response = self.client.get(url, {'limit': 100})
+        self.assertIn('count', response.data)
+        return [item['id'] for item in response.data['results']]
+
+    def test_recipes_cursor_matches_pages(self):
+        ids, queries = self.walk(
+            RECIPES_URL, {'pagination': 'cursor', 'limit': 4}
+        )
+        self.assertEqual(ids, self.page_ids(RECIPES_URL))
+        self.assertEqual(len(ids), 11)
+        for sql in queries:
+            self.assertNotIn('COUNT(', sql)
+            self.assertNotIn('OFFSET', sql)
+
+    def test_subscriptions_cursor_matches_pages(self):
+        self.login(self.reader)
+        ids, _ = self.walk(
+            SUBSCRIPTIONS_URL, {'pagination': 'cursor', 'limit': 3}
+        )
+        self.assertEqual(ids, self.page_ids(SUBSCRIPTIONS_URL))
+        self.assertEqual(len(ids), 7)
+
+    def test_previous_link(self):
+        first = self.client.get(
+            RECIPES_URL, {'pagination': 'cursor', 'limit': 4}
+        )
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from recipe.models import RecipeActivity
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+POPULAR_URL = '/api/recipes/popular/'
+
+
+def popular_recipes():
+    call_command('popular_recipes', stdout=StringIO())
+
+
+class PopularRecipesAPITest(FoodgramAPITestCase):
+    """
+    /popular/ отдает рейтинг окна и метрики, который popular_recipes
+    собирает из дневной активности рецептов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        author = create_user('author')
+        cls.recipes = [create_recipe(author, number) for number in range(3)]
+        today = timezone.localdate()
+        RecipeActivity.objects.bulk_create((
+            RecipeActivity(
+                recipe=cls.recipes[0], day=today, favorites=1, carts=3
+            ),
+            RecipeActivity(recipe=cls.recipes[1], day=today, favorites=2),
+            RecipeActivity(
+                recipe=cls.recipes[2], day=today - timedelta(days=10),
+                favorites=5
+            ),
+            RecipeActivity(
+                recipe=cls.recipes[2], day=today - timedelta(days=40),
+                favorites=7
+            ),
+        ))
+
+    def popular_ids(self, params):
+        response = self.client.get(POPULAR_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data]
+
+    def test_windows_and_metrics(self):
+        popular_recipes()
+        first, second, third = (recipe.pk for recipe in self.recipes)
+        self.assertEqual(self.popular_ids({}), [second, first])
+        self.assertEqual(
+            self.popular_ids({'window': '30d'}), [third, second, first]
+        )
+        self.assertEqual(self.popular_ids({'metric': 'carts'}), [first])
+
+    def test_old_activity_is_removed(self):
+        popular_recipes()
+        self.assertEqual(RecipeActivity.objects.count(), 3)
+
+    def test_unknown_window_or_metric(self):
+        for params in ({'window': '2d'}, {'metric': 'views'}):
+            response = self.client.get(POPULAR_URL, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Ошибка', response.data)
+
+    def test_api_records_activity(self):
+        self.login(self.reader)
+        recipe = self.recipes[2]
+        url = f'/api/recipes/{recipe.pk}/'
+        self.client.post(url + 'favorite/')
+        self.client.post(url + 'shopping_cart/')
+        self.client.delete(url + 'shopping_cart/')
+        activity = RecipeActivity.objects.get(
+            recipe=recipe, day=timezone.localdate()
+        )
+        self.assertEqual((activity.favorites, activity.carts), (1, 0))
+        popular_recipes()
+        self.assertEqual(
+            self.popular_ids({'window': '1d'}),
+            [self.recipes[1].pk, self.recipes[0].pk, recipe.pk]
+        )
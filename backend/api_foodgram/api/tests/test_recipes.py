@@ -0,0 +1,246 @@
+import base64
+import io
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipe.images import build_image_variants
+from recipe.models import (Favorite, Ingredients, IngredientsAmount, Recipe,
+                           ShoppingCart, Tag)
+from users.models import Subscribe
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeListQueriesTest(FoodgramAPITestCase):
+    """Список рецептов читается за фиксированное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        authors = [create_user(f'author{number}') for number in range(2)]
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag{number}', hex_code='#000000'
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredients.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(10)
+        ]
+        recipes = []
+        for number in range(15):
+            recipe = create_recipe(authors[number % 2], number)
+            recipe.tags.set(tags[:number % 3 + 1])
+            IngredientsAmount.objects.bulk_create(
+                IngredientsAmount(
+                    recipe=recipe,
+                    ingredients=ingredients[(number + shift) % 10],
+                    amount=shift + 1
+                )
+                for shift in range(3)
+            )
+            recipes.append(recipe)
+        Favorite.objects.create(user=cls.reader).recipe.add(*recipes[::2])
+        ShoppingCart.objects.create(user=cls.reader).recipe.add(*recipes[::3])
+        Subscribe.objects.create(user=cls.reader, author=authors[0])
+
+    def count_queries(self, limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPES_URL, {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(queries)
+
+    def test_anonymous_list_queries_do_not_depend_on_page_size(self):
+        self.assertEqual(self.count_queries(6), self.count_queries(12))
+
+    def test_authenticated_list_queries_do_not_depend_on_page_size(self):
+        self.login(self.reader)
+        # Первый запрос кладет токен в кэш аутентификации.
+        self.count_queries(6)
+        self.assertEqual(self.count_queries(6), self.count_queries(12))
+
+    def test_authenticated_list_flags(self):
+        self.login(self.reader)
+        results = self.client.get(RECIPES_URL, {'limit': 12}).data['results']
+        favorited = set(
+            Favorite.recipe.through.objects.filter(
+                favorite__user=self.reader
+            ).values_list('recipe', flat=True)
+        )
+        in_cart = set(
+            ShoppingCart.recipe.through.objects.filter(
+                shoppingcart__user=self.reader
+            ).values_list('recipe', flat=True)
+        )
+        for recipe in results:
+            self.assertEqual(recipe['is_favorited'], recipe['id'] in favorited)
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], recipe['id'] in in_cart
+            )
+            self.assertEqual(
+                recipe['author']['is_subscribed'],
+                recipe['author']['username'] == 'author0'
+            )
+            self.assertTrue(recipe['tags'])
+            self.assertEqual(len(recipe['ingredients']), 3)
+
+
+def png_base64(color):
+    """Картинка 2x2 в формате, который принимает Base64ImageField."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2), color).save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class RecipeImageUpdateTest(FoodgramAPITestCase):
+    """Изображение перезаписывается, только если пришло другое."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipe = create_recipe(cls.author, 0)
+        cls.ingredient = Ingredients.objects.create(
+            name='Соль', measurement_unit='г'
+        )
+        IngredientsAmount.objects.create(
+            recipe=cls.recipe, ingredients=cls.ingredient, amount=1
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.author)
+        self.use_temporary_media()
+        patcher = mock.patch('api.serializers.run_in_background')
+        self.background = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch_image(self, image):
+        response = self.client.patch(
+            f'{RECIPES_URL}{self.recipe.pk}/',
+            {
+                'image': image,
+                'ingredients': [{'id': self.ingredient.pk, 'amount': 1}],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        variants = [
+            call for call in self.background.call_args_list
+            if call[0][0] is build_image_variants
+        ]
+        return Recipe.objects.get(pk=self.recipe.pk).image.name, len(variants)
+
+    def test_same_image_is_not_rewritten(self):
+        red, blue = png_base64('red'), png_base64('blue')
+        name, variants = self.patch_image(red)
+        self.assertNotEqual(name, self.recipe.image.name)
+        self.assertEqual(variants, 1)
+        self.assertEqual(self.patch_image(red), (name, 1))
+        other, variants = self.patch_image(blue)
+        self.assertNotEqual(other, name)
+        self.assertEqual(variants, 2)
+
+
+class RecipeWriteQueriesTest(FoodgramAPITestCase):
+    """
+    Теги и ингредиенты рецепта проверяются и записываются пакетно:
+    число запросов не зависит от их количества.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', slug=f'tag{number}', hex_code='#000000'
+            )
+            for number in range(6)
+        ]
+        cls.ingredients = [
+            Ingredients.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(6)
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.author)
+        self.use_temporary_media()
+        self.image = png_base64('green')
+        self.client.get(RECIPES_URL)
+
+    def data(self, name, tags, ingredients):
+        return {
+            'name': name,
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': self.image,
+            'tags': [tag.pk for tag in tags],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': number + 1}
+                for number, ingredient in enumerate(ingredients)
+            ],
+        }
+
+    def count_queries(self, method, url, data, status_code):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, status_code)
+        return len(queries), response
+
+    def test_create_queries_do_not_depend_on_size(self):
+        small, _ = self.count_queries(
+            'post', RECIPES_URL,
+            self.data('Малый', self.tags[:1], self.ingredients[:1]), 201
+        )
+        large, response = self.count_queries(
+            'post', RECIPES_URL,
+            self.data('Большой', self.tags, self.ingredients), 201
+        )
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['tags']), 6)
+        self.assertEqual(len(response.data['ingredients']), 6)
+
+    def test_update_queries_do_not_depend_on_size(self):
+        # Каждое изменение меняет все количества и добавляет
+        # столько же новых ингредиентов и тегов.
+        counts = []
+        for name, size in (('Малый', 1), ('Большой', 3)):
+            _, response = self.count_queries(
+                'post', RECIPES_URL,
+                self.data(name, self.tags[:size], self.ingredients[:size]),
+                201
+            )
+            count, response = self.count_queries(
+                'patch', f'{RECIPES_URL}{response.data["id"]}/',
+                {
+                    'tags': [tag.pk for tag in self.tags[:2 * size]],
+                    'ingredients': [
+                        {'id': ingredient.pk, 'amount': 50}
+                        for ingredient in self.ingredients[:2 * size]
+                    ],
+                },
+                200
+            )
+            counts.append(count)
+            self.assertEqual(len(response.data['ingredients']), 2 * size)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_missing_ids_are_reported_together(self):
+        data = self.data('Рецепт', self.tags, self.ingredients)
+        data['tags'].append(999)
+        data['ingredients'].append({'id': 998, 'amount': 1})
+        _, response = self.count_queries('post', RECIPES_URL, data, 400)
+        self.assertIn('999', str(response.data['tags']))
+        self.assertIn('998', str(response.data['ingredients']))
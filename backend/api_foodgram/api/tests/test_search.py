@@ -0,0 +1,55 @@
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeSearchTest(FoodgramAPITestCase):
+    """
+    ?search= ищет по названию и описанию и сортирует по релевантности:
+    совпадение в названии выше совпадения в описании. В тестах
+    работает запасной путь SQLite по таблице FTS5.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.in_description = create_recipe(
+            author, 0, name='Суп дня', description='Почти как борщ',
+            favorites_count=5
+        )
+        cls.in_name = create_recipe(
+            author, 1, name='Борщ', description='Свекла и капуста',
+            favorites_count=1
+        )
+        cls.other = create_recipe(
+            author, 2, name='Оладьи', description='Мука и кефир'
+        )
+
+    def ids(self, params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(
+            self.ids({'search': 'борщ'}),
+            [self.in_name.pk, self.in_description.pk]
+        )
+
+    def test_prefix_and_case(self):
+        self.assertEqual(self.ids({'search': 'ОЛАД'}), [self.other.pk])
+
+    def test_explicit_ordering_wins(self):
+        self.assertEqual(
+            self.ids({'search': 'борщ', 'ordering': '-favorites_count'}),
+            [self.in_description.pk, self.in_name.pk]
+        )
+
+    def test_index_follows_updates(self):
+        self.other.name = 'Блины'
+        self.other.save()
+        self.assertEqual(self.ids({'search': 'оладьи'}), [])
+        self.assertEqual(self.ids({'search': 'блины'}), [self.other.pk])
+
+    def test_query_without_words(self):
+        self.assertEqual(self.ids({'search': '!!! ?'}), [])
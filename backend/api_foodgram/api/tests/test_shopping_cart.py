@@ -0,0 +1,166 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+
+from api.utils import shopping_cart_ingredients
+from recipe.models import (Ingredients, IngredientsAmount, Recipe,
+                           ShoppingCartTotal)
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+
+class ShoppingCartTotalsTest(FoodgramAPITestCase):
+    """
+    Сводный список покупок совпадает с суммой по рецептам
+    после каждого добавления, изменения и удаления.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.buyers = [create_user(f'buyer{number}') for number in range(2)]
+        cls.ingredients = [
+            Ingredients.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        cls.recipes = []
+        for number in range(3):
+            recipe = create_recipe(cls.author, number)
+            IngredientsAmount.objects.bulk_create(
+                IngredientsAmount(
+                    recipe=recipe,
+                    ingredients=cls.ingredients[number + shift],
+                    amount=10 * (number + 1) + shift
+                )
+                for shift in range(3)
+            )
+            cls.recipes.append(recipe)
+
+    def expected(self, user):
+        return list(
+            IngredientsAmount.objects.filter(
+                recipe__in_shopping_cart__user=user
+            ).values(
+                'ingredients__id',
+                'ingredients__name',
+                'ingredients__measurement_unit',
+            ).annotate(total=Sum('amount')).order_by(
+                'ingredients__name', 'ingredients__measurement_unit'
+            )
+        )
+
+    def assert_totals(self):
+        for user in self.buyers:
+            self.assertEqual(
+                list(shopping_cart_ingredients(user)), self.expected(user)
+            )
+        call_command('cart_totals', verify=True, stdout=StringIO())
+
+    def cart(self, user, recipe, method):
+        self.login(user)
+        response = getattr(self.client, method)(
+            f'/api/recipes/{recipe.pk}/shopping_cart/'
+        )
+        self.assertIn(response.status_code, (201, 204))
+
+    def test_totals_follow_cart_and_recipe_changes(self):
+        for user in self.buyers:
+            for recipe in self.recipes[:2]:
+                self.cart(user, recipe, 'post')
+                self.assert_totals()
+        self.cart(self.buyers[1], self.recipes[2], 'post')
+        self.assert_totals()
+
+        self.login(self.author)
+        response = self.client.patch(
+            f'/api/recipes/{self.recipes[1].pk}/',
+            {
+                'ingredients': [
+                    {'id': self.ingredients[1].pk, 'amount': 7},
+                    {'id': self.ingredients[4].pk, 'amount': 3},
+                ],
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_totals()
+
+        self.cart(self.buyers[0], self.recipes[0], 'delete')
+        self.assert_totals()
+        self.cart(self.buyers[1], self.recipes[1], 'delete')
+        self.assert_totals()
+
+    def test_batch_cart_totals(self):
+        self.login(self.buyers[0])
+        ids = [recipe.pk for recipe in self.recipes]
+        response = self.client.post(
+            '/api/recipes/shopping_cart/', {'recipes': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_totals()
+        response = self.client.delete(
+            '/api/recipes/shopping_cart/', {'recipes': ids[:2]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_totals()
+
+    def test_verify_reports_mismatch(self):
+        self.cart(self.buyers[0], self.recipes[0], 'post')
+        ShoppingCartTotal.objects.filter(user=self.buyers[0]).update(amount=1)
+        with self.assertRaises(CommandError):
+            call_command('cart_totals', verify=True, stdout=StringIO())
+        call_command('cart_totals', stdout=StringIO())
+        self.assert_totals()
+
+    def test_download_errors_are_json(self):
+        self.login(self.buyers[0])
+        for export_format in ('txt', 'csv', 'pdf'):
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/',
+                {'format': export_format}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('Оповещение', response.json())
+        self.cart(self.buyers[0], self.recipes[0], 'post')
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'pdf'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_totals_follow_admin_changes(self):
+        for user in self.buyers:
+            for recipe in self.recipes:
+                self.cart(user, recipe, 'post')
+        amount = IngredientsAmount.objects.filter(
+            recipe=self.recipes[0]
+        ).first()
+        amount.amount += 5
+        amount.save()
+        self.assert_totals()
+        IngredientsAmount.objects.create(
+            recipe=self.recipes[0], ingredients=self.ingredients[4], amount=2
+        )
+        self.assert_totals()
+        amount.delete()
+        self.assert_totals()
+        IngredientsAmount.objects.filter(recipe=self.recipes[1]).delete()
+        self.assert_totals()
+        Recipe.objects.get(pk=self.recipes[2].pk).delete()
+        self.assert_totals()
+        Recipe.objects.filter(pk=self.recipes[0].pk).delete()
+        self.assert_totals()
+        self.assertFalse(ShoppingCartTotal.objects.exists())
+
+    def test_totals_follow_recipe_deletion(self):
+        for user in self.buyers:
+            self.cart(user, self.recipes[0], 'post')
+            self.cart(user, self.recipes[1], 'post')
+        self.login(self.author)
+        response = self.client.delete(f'/api/recipes/{self.recipes[0].pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_totals()
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from api_foodgram import settings
+from recipe.models import Ingredients, IngredientsAmount
+from recipe.similarity import build_similar_recipes
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+
+def similar_url(recipe_pk):
+    return f'/api/recipes/{recipe_pk}/similar/'
+
+
+class SimilarRecipesAPITest(FoodgramAPITestCase):
+    """
+    /similar/ отдает соседей из SimilarRecipe по убыванию
+    сходства, не больше SIMILAR_RECIPES_LIMIT, за два запроса.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        ingredients = [
+            Ingredients.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = []
+        for number, indexes in enumerate((
+            (0, 1, 2), (0, 1, 2), (0, 1), (0,), (3,)
+        )):
+            recipe = create_recipe(author, number)
+            IngredientsAmount.objects.bulk_create(
+                IngredientsAmount(
+                    recipe=recipe, ingredients=ingredients[index], amount=1
+                )
+                for index in indexes
+            )
+            cls.recipes.append(recipe)
+        build_similar_recipes()
+
+    def similar_ids(self, recipe):
+        response = self.client.get(similar_url(recipe.pk))
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data]
+
+    def test_ordered_by_score(self):
+        self.assertEqual(
+            self.similar_ids(self.recipes[0]),
+            [recipe.pk for recipe in self.recipes[1:4]]
+        )
+        self.assertEqual(self.similar_ids(self.recipes[4]), [])
+
+    def test_limit(self):
+        with mock.patch.object(settings, 'SIMILAR_RECIPES_LIMIT', 2):
+            self.assertEqual(
+                self.similar_ids(self.recipes[0]),
+                [recipe.pk for recipe in self.recipes[1:3]]
+            )
+
+    def test_queries(self):
+        with self.assertNumQueries(2):
+            self.client.get(similar_url(self.recipes[0].pk))
+
+    def test_unknown_recipe(self):
+        response = self.client.get(similar_url(self.recipes[-1].pk + 1))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,58 @@
+import json
+
+from api_foodgram import settings
+from .utils import FoodgramAPITestCase, create_recipe, create_user
+
+RECIPES_URL = '/api/recipes/'
+
+
+class RecipeStreamTest(FoodgramAPITestCase):
+    """
+    Размер страницы ограничен MAX_PAG_IN_PAGE, вся выборка
+    отдается потоком в том же виде, что и страницы списка.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user('author')
+        cls.total = settings.MAX_PAG_IN_PAGE + 5
+        for number in range(cls.total):
+            create_recipe(author, number)
+
+    def stream(self, params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def listed(self):
+        listed = []
+        for page in (1, 2):
+            listed.extend(self.client.get(
+                RECIPES_URL, {'limit': settings.MAX_PAG_IN_PAGE, 'page': page}
+            ).data['results'])
+        return json.loads(json.dumps(listed))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(RECIPES_URL, {'limit': 10 ** 6})
+        self.assertEqual(
+            len(response.data['results']), settings.MAX_PAG_IN_PAGE
+        )
+
+    def test_ndjson_stream_has_every_recipe(self):
+        response, content = self.stream({'stream': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        items = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(items), self.total)
+        self.assertEqual(items, self.listed())
+
+    def test_json_stream_with_limit(self):
+        response, content = self.stream({'stream': 'json', 'limit': 7})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(content), self.listed()[:7])
+
+    def test_stream_errors(self):
+        for params in ({'stream': 'xml'}, {'stream': 'json', 'limit': 'a'}):
+            response = self.client.get(RECIPES_URL, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Ошибка', response.data)
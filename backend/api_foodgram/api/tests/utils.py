@@ -0,0 +1,50 @@
+import tempfile
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipe.models import Recipe
+from users.models import CustomUser
+
+
+def create_user(username):
+    """Пользователь с почтой по имени."""
+    return CustomUser.objects.create(
+        username=username, email=f'{username}@example.com'
+    )
+
+
+def create_recipe(author, number, **fields):
+    """
+    Рецепт автора с названием и описанием по номеру,
+    поля из fields заменяют значения по умолчанию.
+    """
+    return Recipe.objects.create(**{
+        'author': author,
+        'name': f'Рецепт {number}',
+        'image': 'recipes/test.png',
+        'description': f'Описание {number}',
+        'cooking_time': 10,
+        **fields
+    })
+
+
+class FoodgramAPITestCase(APITestCase):
+    """Тест API с чистым кэшем и входом по токену."""
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def use_temporary_media(self):
+        """MEDIA_ROOT во временном каталоге до конца теста."""
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
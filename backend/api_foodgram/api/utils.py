@@ -1,9 +1,36 @@
-from django.http import HttpResponse
+import csv
+import io
+import json
+import os
+from functools import lru_cache
+from itertools import chain
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_foodgram import settings
+from recipe.models import ShoppingCartTotal
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
 
-FILE_NAME = 'shopping_cart.txt'
+FILE_NAME = 'shopping_cart'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+PDF_FONT_NAME = 'ShoppingCartFont'
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 18
+PDF_MARGIN = 50
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
 KRISHA = """
 Для ваших кулинарных подвигов необходимо преобрести:\r\n
 """
@@ -12,45 +39,189 @@ POGREB = """
 """
 
 
+def shopping_cart_ingredients(user):
+    """
+    Суммарное количество ингредиентов из списка покупок:
+    одно чтение сводной таблицы по индексу пользователя.
+    """
+    return ShoppingCartTotal.objects.filter(user=user).values(
+        'ingredients__id',
+        'ingredients__name',
+        'ingredients__measurement_unit',
+        total=F('amount'),
+    ).order_by('ingredients__name', 'ingredients__measurement_unit')
+
+
 @api_view(['GET'])
+@renderer_classes(
+    (JSONRenderer, PlainTextRenderer, CSVRenderer, PDFRenderer)
+)
 def download_shopping_cart(request):
-    """Функция печати списка покупок."""
+    """
+    Функция печати списка покупок.
+    Формат выбирается параметром format (txt, csv, pdf),
+    строки пишутся в ответ по мере чтения из базы.
+    """
     if not request.user.is_authenticated:
-        return Response(
+        return json_response(
+            request,
             {"Оповещение": "Авторизируйтесь, пожалуйста!"},
             status=status.HTTP_401_UNAUTHORIZED
         )
-    recipes = request.user.in_shopping_cart.recipe.prefetch_related('ingredients')
-    if not recipes:
-        return Response(
+    export_format = request.accepted_renderer.format
+    if export_format not in SHOPPING_CART_WRITERS:
+        export_format = 'txt'
+    ingredients = shopping_cart_ingredients(request.user).iterator()
+    first_ingredient = next(ingredients, None)
+    if first_ingredient is None:
+        return json_response(
+            request,
             {"Оповещение": "Список покупок пуст!"},
             status=status.HTTP_400_BAD_REQUEST
         )
-    name_ingredients = []
-    wight_ingredients = []
-    ingredients_to_write = {}
-    ingredients_for_download = ''
-    for recipe in recipes:
-        for i in recipe.ingredients.values():
-            name_ingredients.append([i['name'], i['measurement_unit']])
-        for i in recipe.ingredientsamount_set.values():
-            wight_ingredients.append(i['amount'])
-    for i in range(len(name_ingredients)):
-        name_ingredients[i].append(wight_ingredients[i])
-    for ingredient in name_ingredients:
-        if not ingredient[0] in ingredients_to_write:
-            ingredients_to_write[ingredient[0]] = [ingredient[1], ingredient[2]]
-        else:
-            ingredients_to_write[ingredient[0]][1] += ingredient[2]
-    for ingr_for_down in ingredients_to_write:
-        ingredients_for_download += (
-            f'{ingr_for_down}'
-            f' - {ingredients_to_write[ingr_for_down][1]}'
-            f'{ingredients_to_write[ingr_for_down][0]}.\r\n'
-        )
-    response = HttpResponse(
-        KRISHA + ingredients_for_download + POGREB,
-        content_type='text/plain,charset=utf8'
+    writer, content_type = SHOPPING_CART_WRITERS[export_format]
+    response = StreamingHttpResponse(
+        writer(chain((first_ingredient,), ingredients)),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename={FILE_NAME}.{export_format}'
     )
-    response['Content-Disposition'] = f'attachment; filename={FILE_NAME}'
     return response
+
+
+def json_response(request, data, status):
+    """
+    Оповещение в JSON независимо от выбранного ?format: рендерер
+    запроса подменяется до того, как DRF подставит его в ответ.
+    """
+    request.accepted_renderer = JSONRenderer()
+    request.accepted_media_type = JSONRenderer.media_type
+    return Response(data, status=status)
+
+
+def ingredient_line(ingredient):
+    return (
+        f'{ingredient["ingredients__name"]}'
+        f' - {ingredient["total"]}'
+        f'{ingredient["ingredients__measurement_unit"]}.'
+    )
+
+
+def write_txt(ingredients):
+    yield KRISHA.encode()
+    for ingredient in ingredients:
+        yield f'{ingredient_line(ingredient)}\r\n'.encode()
+    yield POGREB.encode()
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: отдает строку вместо записи."""
+    def write(self, value):
+        return value
+
+
+def write_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER).encode()
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredients__name'],
+            ingredient['total'],
+            ingredient['ingredients__measurement_unit'],
+        )).encode()
+
+
+@lru_cache(maxsize=None)
+def pdf_font_name():
+    """Шрифт с кириллицей, если он есть в системе, иначе Helvetica."""
+    if not os.path.exists(settings.PDF_FONT_PATH):
+        return 'Helvetica'
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, settings.PDF_FONT_PATH))
+    return PDF_FONT_NAME
+
+
+def write_pdf(ingredients):
+    """
+    PDF собирается постранично по мере чтения строк, но
+    таблица ссылок пишется в конец файла, поэтому документ
+    отдается целиком после сборки.
+    """
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    font = pdf_font_name()
+    lines = chain(
+        (line.strip() for line in KRISHA.splitlines() if line.strip()),
+        (ingredient_line(ingredient) for ingredient in ingredients),
+        (line.strip() for line in POGREB.splitlines() if line.strip()),
+    )
+    width, height = A4
+    pdf.setFont(font, PDF_FONT_SIZE)
+    position = height - PDF_MARGIN
+    for line in lines:
+        if position < PDF_MARGIN:
+            pdf.showPage()
+            pdf.setFont(font, PDF_FONT_SIZE)
+            position = height - PDF_MARGIN
+        pdf.drawString(PDF_MARGIN, position, line)
+        position -= PDF_LINE_HEIGHT
+    pdf.save()
+    yield buffer.getvalue()
+
+
+SHOPPING_CART_WRITERS = {
+    'txt': (write_txt, 'text/plain; charset=utf-8'),
+    'csv': (write_csv, 'text/csv; charset=utf-8'),
+    'pdf': (write_pdf, 'application/pdf'),
+}
+
+
+def serialize_in_chunks(queryset, serializer_class, context, limit=None,
+                        chunk_size=settings.STREAM_CHUNK_SIZE):
+    """
+    Сериализация выборки порциями по chunk_size объектов.
+    Первичные ключи читаются серверным курсором, каждая порция
+    загружается отдельным запросом со всеми prefetch_related,
+    поэтому в памяти одновременно находится не больше одной порции.
+    """
+    pks = queryset.values_list('pk', flat=True)
+    if limit is not None:
+        pks = pks[:limit]
+    chunk = []
+    for pk in pks.iterator(chunk_size=chunk_size):
+        chunk.append(pk)
+        if len(chunk) == chunk_size:
+            yield from serializer_class(
+                queryset.filter(pk__in=chunk), many=True, context=context
+            ).data
+            chunk = []
+    if chunk:
+        yield from serializer_class(
+            queryset.filter(pk__in=chunk), many=True, context=context
+        ).data
+
+
+def stream_serialized(queryset, serializer_class, context, stream_format,
+                      limit=None):
+    """Потоковый ответ в формате NDJSON или JSON-массива."""
+    items = (
+        json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+        for item in serialize_in_chunks(
+            queryset, serializer_class, context, limit
+        )
+    )
+    if stream_format == 'ndjson':
+        content = (item + '\n' for item in items)
+    else:
+        content = json_array(items)
+    return StreamingHttpResponse(
+        content, content_type=STREAM_CONTENT_TYPES[stream_format]
+    )
+
+
+def json_array(items):
+    """Склейка сериализованных объектов в JSON-массив."""
+    yield '['
+    for number, item in enumerate(items):
+        yield item if number == 0 else ',' + item
+    yield ']'
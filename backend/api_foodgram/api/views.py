@@ -1,3 +1,5 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Prefetch
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework.backends import DjangoFilterBackend
 from rest_framework import status, viewsets
@@ -5,37 +7,132 @@ from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 
-from recipe.models import Favorite, Ingredients, Recipe, ShoppingCart, Tag
-from .filters import IngredientsFilter, RecipeFilter
-from .pagination import LimitPageNumberPagination
+from api_foodgram import settings
+from recipe.feed import fan_out_recipe
+from recipe.images import build_image_variants
+from recipe.ingredient_index import ingredient_index
+from recipe.models import (RECIPE_COUNTERS, Favorite, Ingredients,
+                           IngredientsAmount, Recipe, RecipeActivity,
+                           ShoppingCart, ShoppingCartTotal, Tag)
+from recipe.similarity import refresh_similar_recipes
+from recipe.workers import run_in_background
+from users.models import Subscribe
+from .filters import IngredientsFilter, RecipeFilter, RecipeOrderingFilter
+from .pagination import FeedPagination, LimitPageOrCursorPagination
 from .permissions import IsAdminOnly, IsAuthorOrAdminReadOnly
 from .serializers import (IngredientSerializer, RecipeCreateSerializer,
-                          RecipeFavoriteSerializer, RecipesListSerializer,
-                          TagSerializer)
+                          RecipeFavoriteSerializer, RecipeIdsSerializer,
+                          RecipesListSerializer, TagSerializer)
+from .utils import STREAM_CONTENT_TYPES, stream_serialized
+
+STREAM_QUERY_PARAM = 'stream'
+BATCH_ADDED = 'added'
+BATCH_ALREADY_ADDED = 'already_added'
+BATCH_REMOVED = 'removed'
+BATCH_ABSENT = 'absent'
+BATCH_NOT_FOUND = 'not_found'
+BATCH_OWN_RECIPE = 'own_recipe'
+RECIPE_ACTIVITY = {
+    Favorite: 'favorites',
+    ShoppingCart: 'carts',
+}
+# Поля рецепта для проверки автора и краткого ответа на добавление.
+RECIPE_SHORT_FIELDS = ('author', 'name', 'image', 'cooking_time')
 
 
 class RecipesViewSet(viewsets.ModelViewSet):
     """Вьюсет для рецептов."""
     queryset = Recipe.objects.all().order_by('-pk')
     permission_classes = (IsAuthorOrAdminReadOnly,)
-    pagination_class = LimitPageNumberPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = LimitPageOrCursorPagination
+    filter_backends = (DjangoFilterBackend, RecipeOrderingFilter)
     filterset_class = RecipeFilter
+    ordering_fields = ('favorites_count', 'in_carts_count')
+    ordering = ('-pk',)
+
+    def get_queryset(self):
+        """
+        Рецепты со всеми связями за фиксированное число запросов:
+        флаги избранного, списка покупок и подписки на автора
+        считаются подзапросами Exists, теги и ингредиенты
+        подгружаются через Prefetch.
+        """
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'ingredientsamount_set',
+                queryset=IngredientsAmount.objects.select_related(
+                    'ingredients'
+                )
+            ),
+            'image_variants',
+        ).defer('search_vector').order_by('-pk')
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.recipe.through.objects.filter(
+                    favorite__user=user, recipe=OuterRef('pk')
+                )
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.recipe.through.objects.filter(
+                    shoppingcart__user=user, recipe=OuterRef('pk')
+                )
+            ),
+            author_is_subscribed=Exists(
+                Subscribe.objects.filter(
+                    user=user, author=OuterRef('author')
+                )
+            ),
+        )
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipesListSerializer
         return RecipeCreateSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Постраничный список, либо потоковая выдача всей выборки
+        при ?stream=ndjson или ?stream=json: размер страницы в обычном
+        режиме ограничен MAX_PAG_IN_PAGE, а поток отдается порциями.
+        """
+        stream_format = request.query_params.get(STREAM_QUERY_PARAM)
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+        if stream_format not in STREAM_CONTENT_TYPES:
+            return Response(
+                {"Ошибка": "Неизвестный формат потока!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = request.query_params.get('limit')
+        if limit is not None and not limit.isdigit():
+            return Response(
+                {"Ошибка": "limit должен быть целым числом!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return stream_serialized(
+            self.filter_queryset(self.get_queryset()),
+            RecipesListSerializer,
+            self.get_serializer_context(),
+            stream_format,
+            limit=int(limit) if limit else None
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        run_in_background(build_image_variants, serializer.instance.pk)
+        run_in_background(refresh_similar_recipes, serializer.instance.pk)
+        run_in_background(fan_out_recipe, serializer.instance.pk)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         serializer = RecipesListSerializer(
-            instance=serializer.instance,
+            instance=self.get_queryset().get(pk=serializer.instance.pk),
             context={'request': self.request}
         )
         headers = self.get_success_headers(serializer.data)
@@ -52,7 +149,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         serializer = RecipesListSerializer(
-            instance=serializer.instance,
+            instance=self.get_queryset().get(pk=serializer.instance.pk),
             context={'request': self.request},
         )
         return Response(
@@ -66,11 +163,10 @@ class RecipesViewSet(viewsets.ModelViewSet):
     )
     def favorite(self, request, pk=None):
         """Обработка избранного."""
-        recipe = get_object_or_404(Recipe, pk=pk)
-        model = Favorite.objects.get_or_create(
-            user=request.user
+        recipe = get_object_or_404(
+            Recipe.objects.only(*RECIPE_SHORT_FIELDS), pk=pk
         )
-        return favorite_shop_card(recipe, request, model)
+        return favorite_shop_card(recipe, request, Favorite)
 
     @action(
         methods=(['post', 'delete']),
@@ -79,37 +175,154 @@ class RecipesViewSet(viewsets.ModelViewSet):
     )
     def shopping_cart(self, request, pk=None):
         """Обработка списка покупок."""
+        recipe = get_object_or_404(
+            Recipe.objects.only(*RECIPE_SHORT_FIELDS), pk=pk
+        )
+        return favorite_shop_card(recipe, request, ShoppingCart)
+
+    @action(methods=(['get']), detail=True)
+    def similar(self, request, pk=None):
+        """Похожие по ингредиентам рецепты из заранее посчитанного индекса."""
         recipe = get_object_or_404(Recipe, pk=pk)
-        model = ShoppingCart.objects.get_or_create(
-            user=request.user
+        similar = Recipe.objects.filter(
+            similar_for__recipe=recipe
+        ).order_by('-similar_for__score', 'pk')[
+            :settings.SIMILAR_RECIPES_LIMIT
+        ]
+        serializer = RecipeFavoriteSerializer(
+            similar, many=True, context={'request': request}
         )
-        return favorite_shop_card(recipe, request, model)
+        return Response(serializer.data)
+
+    @action(
+        methods=(['get']),
+        detail=False,
+        permission_classes=(IsAuthenticated,)
+    )
+    def feed(self, request):
+        """
+        Лента рецептов авторов из подписок с курсорной
+        пагинацией по -pk.
+        """
+        paginator = FeedPagination()
+        page = paginator.paginate_feed(
+            self.get_queryset(), request.user, request
+        )
+        serializer = RecipesListSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=(['get']), detail=False)
+    def popular(self, request):
+        """
+        Рейтинг рецептов за окно ?window=7d по ?metric=favorites
+        или carts из таблицы, которую собирает popular_recipes.
+        """
+        window = request.query_params.get(
+            'window', settings.POPULAR_DEFAULT_WINDOW
+        )
+        metric = request.query_params.get(
+            'metric', settings.POPULAR_METRICS[0]
+        )
+        if window not in settings.POPULAR_WINDOWS:
+            return Response(
+                {"Ошибка": "Неизвестное окно рейтинга!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if metric not in settings.POPULAR_METRICS:
+            return Response(
+                {"Ошибка": "Неизвестная метрика рейтинга!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        popular = Recipe.objects.filter(
+            popular__window=window, popular__metric=metric
+        ).order_by('popular__rank')
+        serializer = RecipeFavoriteSerializer(
+            popular, many=True, context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(
+        methods=(['post', 'delete']),
+        detail=False,
+        url_path='favorite',
+        url_name='favorite-batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def favorite_batch(self, request):
+        """Пакетная обработка избранного."""
+        return favorite_shop_card_batch(request, Favorite)
+
+    @action(
+        methods=(['post', 'delete']),
+        detail=False,
+        url_path='shopping_cart',
+        url_name='shopping_cart-batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_batch(self, request):
+        """Пакетная обработка списка покупок."""
+        return favorite_shop_card_batch(request, ShoppingCart)
+
+
+def locked_container(model, user, create=False):
+    """
+    Favorite или ShoppingCart пользователя, заблокированный до конца
+    транзакции. Строки промежуточной таблицы меняются только под этой
+    блокировкой, поэтому прочитанный набор рецептов совпадает
+    с записанным, а счетчики сдвигаются ровно на изменившиеся строки.
+    Существующая строка читается и блокируется одним запросом.
+    """
+    containers = model.objects.select_for_update()
+    if create:
+        return containers.get_or_create(user=user)[0]
+    return containers.filter(user=user).first()
 
 
 def favorite_shop_card(data, request, model):
     """
     Устранение дублирования кода для
-    Favorite и ShoppingCard
+    Favorite и ShoppingCard.
+    Рецепт добавляется одной вставкой в промежуточную таблицу,
+    повтор отсекает уникальность пары; удаление - один DELETE,
+    о наличии рецепта судим по числу удаленных строк.
     """
+    through = model.recipe.through
+    container_field = model.recipe.field.m2m_field_name()
     if request.method == 'POST':
-        if data.author == request.user:
+        if data.author_id == request.user.pk:
             return Response(
                 {"Ошибка": "Нельзя добавить свой рецепт!"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if (model[0].recipe.filter(pk__in=(data.pk,)).exists()):
+        try:
+            with transaction.atomic():
+                container = locked_container(model, request.user, create=True)
+                through.objects.create(
+                    **{container_field: container, 'recipe': data}
+                )
+                update_recipes_stats((data.pk,), request, model, 1)
+        except IntegrityError:
             return Response(
                 {"Ошибка": "Рецепт уже есть присутствует!"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        model[0].recipe.add(data)
         serializer = RecipeFavoriteSerializer(data)
         return Response(
             serializer.data,
             status=status.HTTP_201_CREATED
         )
-    if model[0].recipe.filter(pk__in=(data.pk,)).exists():
-        model[0].recipe.remove(data)
+    with transaction.atomic():
+        container = locked_container(model, request.user)
+        deleted = 0
+        if container is not None:
+            deleted, _ = through.objects.filter(
+                **{container_field: container, 'recipe': data}
+            ).delete()
+        if deleted:
+            update_recipes_stats((data.pk,), request, model, -1)
+    if deleted:
         return Response(
             {"Оповещение": "Рецепт удален!"},
             status=status.HTTP_204_NO_CONTENT
@@ -120,6 +333,88 @@ def favorite_shop_card(data, request, model):
     )
 
 
+def favorite_shop_card_batch(request, model):
+    """
+    Пакетное добавление и удаление рецептов в Favorite и ShoppingCard.
+    Рецепты проверяются одним запросом, строки промежуточной таблицы
+    читаются и вставляются или удаляются под блокировкой контейнера
+    пользователя, в ответе статус по каждому id.
+    """
+    serializer = RecipeIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+    authors = dict(
+        Recipe.objects.filter(pk__in=ids).values_list('pk', 'author')
+    )
+    results = {pk: BATCH_NOT_FOUND for pk in ids if pk not in authors}
+    through = model.recipe.through
+    container_field = model.recipe.field.m2m_field_name()
+    if request.method == 'POST':
+        for pk, author in authors.items():
+            if author == request.user.pk:
+                results[pk] = BATCH_OWN_RECIPE
+        candidates = [pk for pk in authors if pk not in results]
+        with transaction.atomic():
+            container = locked_container(model, request.user, create=True)
+            existing = set(
+                through.objects.filter(
+                    **{container_field: container, 'recipe__in': candidates}
+                ).values_list('recipe', flat=True)
+            )
+            added = [pk for pk in candidates if pk not in existing]
+            through.objects.bulk_create(
+                through(**{container_field: container, 'recipe_id': pk})
+                for pk in added
+            )
+            update_recipes_stats(added, request, model, 1)
+        results.update((pk, BATCH_ALREADY_ADDED) for pk in existing)
+        results.update((pk, BATCH_ADDED) for pk in added)
+    else:
+        with transaction.atomic():
+            container = locked_container(model, request.user)
+            removed = set()
+            if container is not None:
+                links = through.objects.filter(
+                    **{container_field: container, 'recipe__in': ids}
+                )
+                removed = set(links.values_list('recipe', flat=True))
+                links.delete()
+            update_recipes_stats(removed, request, model, -1)
+        results.update(
+            (pk, BATCH_REMOVED if pk in removed else BATCH_ABSENT)
+            for pk in authors
+        )
+    return Response(
+        [{'id': pk, 'status': results[pk]} for pk in ids],
+        status=status.HTTP_200_OK
+    )
+
+
+def update_recipes_stats(recipes, request, model, delta):
+    """
+    Сдвиг счетчика рецептов на delta, учет в активности за день
+    и пересчет сводного списка покупок по их ингредиентам.
+    recipes - только рецепты, чьи строки промежуточной таблицы
+    действительно вставлены или удалены в текущей транзакции
+    под блокировкой контейнера из locked_container.
+    """
+    if not recipes:
+        return
+    counter = RECIPE_COUNTERS[model]
+    Recipe.objects.filter(pk__in=recipes).update(
+        **{counter: F(counter) + delta}
+    )
+    RecipeActivity.objects.record(recipes, RECIPE_ACTIVITY[model], delta)
+    if model is ShoppingCart:
+        ShoppingCartTotal.objects.refresh(
+            (request.user.pk,),
+            IngredientsAmount.objects.filter(
+                recipe__in=recipes
+            ).values('ingredients'),
+            lock=False
+        )
+
+
 class IngredientsViewSet(viewsets.ModelViewSet):
     """Вьюсет для ингредиентов."""
     queryset = Ingredients.objects.all()
@@ -128,6 +423,15 @@ class IngredientsViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientsFilter
 
+    def list(self, request, *args, **kwargs):
+        """Автодополнение по ?name= отвечает из индекса в памяти."""
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            ingredient_index.search(name, settings.INGREDIENT_SEARCH_LIMIT)
+        )
+
 
 class TagViewSet(viewsets.ModelViewSet):
     """Вьюсет для тегов."""
@@ -119,9 +119,26 @@ DOCS_ROOT = os.path.join(BASE_DIR, 'docs')
 AUTH_USER_MODEL = 'users.CustomUser'
 
 
+# Кэш токенов сбрасывается сигналами только в том процессе, где
+# произошли выход или изменение пользователя. С LocMemCache по умолчанию
+# это мгновенно лишь при одном процессе (один воркер gunicorn, как
+# в Dockerfile). При нескольких воркерах нужен общий кэш
+# в CACHE_BACKEND/CACHE_LOCATION, иначе остальные воркеры принимают
+# отозванный токен до истечения AUTH_TOKEN_CACHE_TTL.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 300))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -147,3 +164,45 @@ DJOSER = {
 
 
 NUM_PAG_IN_PAGE = 6
+SUBSCRIPTION_RECIPES_LIMIT = 3
+MAX_PAG_IN_PAGE = int(os.getenv('MAX_PAG_IN_PAGE', 100))
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 100))
+
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+BACKGROUND_QUEUE_SIZE = int(os.getenv('BACKGROUND_QUEUE_SIZE', 100))
+
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (600, 600),
+    'detail': (1200, 1200),
+}
+RECIPE_IMAGE_QUALITY = 85
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+INGREDIENT_SEARCH_LIMIT = 50
+
+SIMILAR_RECIPES_LIMIT = int(os.getenv('SIMILAR_RECIPES_LIMIT', 10))
+# Ингредиенты чаще чем в SIMILAR_RECIPES_MAX_DF рецептах не учитываются:
+# они есть почти везде и делают матрицу пересечений плотной.
+SIMILAR_RECIPES_MAX_DF = int(os.getenv('SIMILAR_RECIPES_MAX_DF', 1000))
+SIMILAR_RECIPES_BLOCK_NNZ = int(
+    os.getenv('SIMILAR_RECIPES_BLOCK_NNZ', 5_000_000)
+)
+SIMILAR_RECIPES_CANDIDATES = int(os.getenv('SIMILAR_RECIPES_CANDIDATES', 200))
+SIMILAR_COMMON_INGREDIENTS_TTL = 60 * 60
+
+POPULAR_WINDOWS = {
+    '1d': 1,
+    '7d': 7,
+    '30d': 30,
+}
+POPULAR_DEFAULT_WINDOW = '7d'
+POPULAR_METRICS = ('favorites', 'carts')
+POPULAR_RECIPES_LIMIT = int(os.getenv('POPULAR_RECIPES_LIMIT', 100))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 1000))
+FEED_BACKFILL_LIMIT = 50
+
+PDF_FONT_PATH = os.getenv(
+    'PDF_FONT_PATH', '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_foodgram.settings')
 
 application = get_wsgi_application()
+
+from recipe.ingredient_index import ingredient_index  # noqa: E402
+
+ingredient_index.warm()
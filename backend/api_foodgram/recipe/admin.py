@@ -11,15 +11,15 @@ class RecipeIngredientsInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipesAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'author', 'recipes_in_favorites')
+    list_display = (
+        'pk', 'name', 'author', 'favorites_count', 'in_carts_count',
+    )
     list_filter = ('name', 'author', 'tags',)
     empty_value_display = '-пусто-'
     list_per_page = 10
+    list_select_related = ('author',)
     inlines = [RecipeIngredientsInline]
 
-    def recipes_in_favorites(self, obj):
-        return obj.in_favorite.count()
-
 
 @admin.register(Ingredients)
 class IngredientsAdmin(admin.ModelAdmin):
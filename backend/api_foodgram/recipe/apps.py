@@ -3,3 +3,44 @@ from django.apps import AppConfig
 
 class RecipeConfig(AppConfig):
     name = 'recipe'
+
+    def ready(self):
+        from django.db.models.signals import (post_delete, post_save,
+                                              pre_delete)
+
+        from .ingredient_index import ingredient_index
+        from .models import (RECIPE_COUNTERS, Ingredients, IngredientsAmount,
+                             Recipe, refresh_totals_for_amount,
+                             refresh_totals_for_recipe,
+                             release_recipe_counters)
+        post_save.connect(
+            ingredient_index.invalidate,
+            sender=Ingredients,
+            dispatch_uid='ingredient_index_save'
+        )
+        post_delete.connect(
+            ingredient_index.invalidate,
+            sender=Ingredients,
+            dispatch_uid='ingredient_index_delete'
+        )
+        post_save.connect(
+            refresh_totals_for_amount,
+            sender=IngredientsAmount,
+            dispatch_uid='cart_totals_amount_save'
+        )
+        post_delete.connect(
+            refresh_totals_for_amount,
+            sender=IngredientsAmount,
+            dispatch_uid='cart_totals_amount_delete'
+        )
+        pre_delete.connect(
+            refresh_totals_for_recipe,
+            sender=Recipe,
+            dispatch_uid='cart_totals_recipe_delete'
+        )
+        for model in RECIPE_COUNTERS:
+            pre_delete.connect(
+                release_recipe_counters,
+                sender=model,
+                dispatch_uid=f'recipe_counters_{model._meta.model_name}'
+            )
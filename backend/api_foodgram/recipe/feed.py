@@ -0,0 +1,95 @@
+from django.db.models import OuterRef, Subquery
+
+from api_foodgram import settings
+from users.models import Subscribe
+from .models import FeedEntry, Recipe
+
+FEED_BATCH_SIZE = 1000
+
+
+def followers_beyond_limit(author):
+    """
+    Подписчик с номером FEED_FANOUT_LIMIT + 1, если он есть:
+    проверка читает не больше FEED_FANOUT_LIMIT + 1 строк индекса.
+    """
+    return Subscribe.objects.filter(author=author).order_by('pk').values(
+        'pk'
+    )[settings.FEED_FANOUT_LIMIT:settings.FEED_FANOUT_LIMIT + 1]
+
+
+def is_popular_author(author):
+    """У автора слишком много подписчиков для записи в ленты."""
+    return followers_beyond_limit(author).exists()
+
+
+def popular_authors(user):
+    """
+    Авторы из подписок user, чьи рецепты не раскладываются
+    по лентам и читаются напрямую при запросе ленты.
+    """
+    return Subscribe.objects.filter(user=user).annotate(
+        beyond_limit=Subquery(followers_beyond_limit(OuterRef('author')))
+    ).filter(beyond_limit__isnull=False).values('author')
+
+
+def feed_recipe_ids(user, limit, position=None, reverse=False):
+    """
+    До limit id рецептов ленты user после position: по убыванию id,
+    при reverse - по возрастанию. Каждый источник читается своей
+    выборкой с ключом и LIMIT по индексу: записи FeedEntry
+    по (user, recipe) и рецепты каждого популярного автора
+    по (author, id). Результаты сливаются в Python.
+    """
+    lookup, ordering = ('gt', '') if reverse else ('lt', '-')
+    sources = [(FeedEntry.objects.filter(user=user), 'recipe')]
+    sources.extend(
+        (Recipe.objects.filter(author=author), 'pk')
+        for author in popular_authors(user).values_list('author', flat=True)
+    )
+    ids = set()
+    for source, field in sources:
+        if position is not None:
+            source = source.filter(**{f'{field}__{lookup}': position})
+        ids.update(
+            source.order_by(f'{ordering}{field}').values_list(
+                field, flat=True
+            )[:limit]
+        )
+    return sorted(ids, reverse=not reverse)[:limit]
+
+
+def fan_out_recipe(recipe_id):
+    """Запись нового рецепта в ленты подписчиков автора."""
+    author = Recipe.objects.filter(pk=recipe_id).values_list(
+        'author', flat=True
+    ).first()
+    if author is None or is_popular_author(author):
+        return
+    followers = list(
+        Subscribe.objects.filter(author=author).values_list('user', flat=True)
+    )
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user, recipe_id=recipe_id) for user in followers),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Последние рецепты автора в ленту нового подписчика, по id обоих."""
+    if is_popular_author(author_id):
+        return
+    recipes = Recipe.objects.filter(author=author_id).order_by(
+        '-pk'
+    ).values_list('pk', flat=True)[:settings.FEED_BACKFILL_LIMIT]
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, recipe_id=recipe) for recipe in recipes),
+        ignore_conflicts=True
+    )
+
+
+def clear_feed(user_id, author_id):
+    """Удаление рецептов автора из ленты после отписки, по id обоих."""
+    FeedEntry.objects.filter(
+        user=user_id, recipe__author=author_id
+    ).delete()
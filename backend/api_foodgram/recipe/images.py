@@ -0,0 +1,58 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from api_foodgram import settings
+from .models import Recipe, RecipeImageVariant
+
+
+def variant_format():
+    """WebP, если Pillow собран с его поддержкой, иначе JPEG."""
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def build_image_variants(recipe_id):
+    """
+    Построение уменьшенных копий изображения рецепта.
+    Выполняется в фоновом пуле, запрос только сохраняет оригинал.
+    Файлы устаревших копий остаются на диске до запуска gc_media.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    source = recipe.image.name
+    if RecipeImageVariant.objects.filter(
+        recipe_id=recipe_id, source=source
+    ).count() == len(settings.RECIPE_IMAGE_VARIANTS):
+        return
+    with recipe.image.open('rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image = image.convert('RGB')
+    image_format, extension = variant_format()
+    variants = []
+    for kind, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(
+            buffer, image_format, quality=settings.RECIPE_IMAGE_QUALITY
+        )
+        variant = RecipeImageVariant(
+            recipe_id=recipe_id, kind=kind, source=source
+        )
+        variant.image.save(
+            f'{kind}.{extension}',
+            ContentFile(buffer.getvalue()),
+            save=False
+        )
+        variants.append(variant)
+    with transaction.atomic():
+        if Recipe.objects.select_for_update().filter(
+            pk=recipe_id, image=source
+        ).exists():
+            RecipeImageVariant.objects.filter(recipe_id=recipe_id).delete()
+            RecipeImageVariant.objects.bulk_create(variants)
@@ -0,0 +1,97 @@
+import logging
+import time
+from bisect import bisect_left
+from itertools import islice
+from threading import Lock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from api_foodgram import settings
+from .models import Ingredients
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_KEY = 'ingredient_index_version'
+
+
+class IngredientIndex:
+    """
+    Отсортированный в памяти процесса список названий ингредиентов
+    для автодополнения. Поиск по префиксу - бинарный поиск,
+    затем добор совпадений по подстроке, база не затрагивается.
+    Сброс увеличивает версию индекса в кэше Django: при общем кэше
+    (CACHE_BACKEND) ее видят все процессы, включая сброс из
+    management-команд, иначе чужие изменения подхватываются
+    по истечении ttl.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.lock = Lock()
+        self.state = None
+
+    def invalidate(self, **kwargs):
+        try:
+            cache.incr(INDEX_VERSION_KEY)
+        except ValueError:
+            cache.set(INDEX_VERSION_KEY, 1, None)
+        self.state = None
+
+    def warm(self):
+        try:
+            self.get_state()
+        except DatabaseError:
+            logger.warning('Индекс ингредиентов не построен.', exc_info=True)
+
+    def get_state(self):
+        state = self.state
+        version = cache.get(INDEX_VERSION_KEY)
+        if (
+            state is not None
+            and state[1] == version
+            and time.monotonic() - state[0] < self.ttl
+        ):
+            return state
+        with self.lock:
+            if self.state is state:
+                entries = sorted(
+                    (name.casefold(), name, measurement_unit, pk)
+                    for pk, name, measurement_unit
+                    in Ingredients.objects.values_list(
+                        'pk', 'name', 'measurement_unit'
+                    ).iterator()
+                )
+                self.state = (
+                    time.monotonic(),
+                    version,
+                    [entry[0] for entry in entries],
+                    entries,
+                )
+            return self.state
+
+    def search(self, query, limit):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        _, _, keys, entries = self.get_state()
+        query = query.casefold()
+        start = bisect_left(keys, query)
+        found = []
+        for entry in islice(entries, start, start + limit):
+            if not entry[0].startswith(query):
+                break
+            found.append(entry)
+        if len(found) < limit:
+            found.extend(islice(
+                (
+                    entry for entry in entries
+                    if query in entry[0] and not entry[0].startswith(query)
+                ),
+                limit - len(found)
+            ))
+        return [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, name, measurement_unit, pk in found
+        ]
+
+
+ingredient_index = IngredientIndex(settings.INGREDIENT_INDEX_TTL)
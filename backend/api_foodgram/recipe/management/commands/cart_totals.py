@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.models import ShoppingCart, ShoppingCartTotal
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify shopping cart totals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare stored totals with recalculated ones.'
+        )
+
+    def handle(self, *args, **options):
+        users = ShoppingCart.objects.values('user')
+        if options['verify']:
+            self.verify(users)
+            return
+        ShoppingCartTotal.objects.exclude(user__in=users).delete()
+        ShoppingCartTotal.objects.refresh(users)
+        self.stdout.write(self.style.SUCCESS('Shopping cart totals rebuilt.'))
+
+    def verify(self, users):
+        expected = {
+            (row['recipe__in_shopping_cart__user'], row['ingredients']):
+                row['total']
+            for row in ShoppingCartTotal.objects.calculate(users).iterator()
+        }
+        stored = {
+            (row['user'], row['ingredients']): row['amount']
+            for row in ShoppingCartTotal.objects.values(
+                'user', 'ingredients', 'amount'
+            ).iterator()
+        }
+        mismatches = {
+            key for key in expected.keys() | stored.keys()
+            if expected.get(key) != stored.get(key)
+        }
+        for user, ingredient in sorted(mismatches):
+            self.stdout.write(
+                f'Пользователь {user}, ингредиент {ingredient}: '
+                f'сохранено {stored.get((user, ingredient))}, '
+                f'должно быть {expected.get((user, ingredient))}'
+            )
+        if mismatches:
+            raise CommandError(
+                f'Расхождений в списках покупок: {len(mismatches)}.'
+            )
+        self.stdout.write(self.style.SUCCESS('Shopping cart totals are OK.'))
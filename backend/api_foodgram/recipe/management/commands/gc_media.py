@@ -0,0 +1,76 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipe.models import Recipe, RecipeImageVariant
+from recipe.storage import content_storage
+
+MEDIA_PREFIX = 'recipes'
+
+
+class Command(BaseCommand):
+    help = 'Delete recipe images that are not referenced anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list files that would be deleted.'
+        )
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=60,
+            help='Keep files younger than this: they may be mid-upload.'
+        )
+
+    def handle(self, *args, **options):
+        referenced = set(
+            Recipe.objects.values_list('image', flat=True).iterator()
+        ) | set(
+            RecipeImageVariant.objects.values_list(
+                'image', flat=True
+            ).iterator()
+        )
+        deadline = timezone.now() - timedelta(
+            minutes=options['grace_minutes']
+        )
+        deleted = 0
+        for name in self.walk(MEDIA_PREFIX):
+            if name in referenced or self.is_fresh(name, deadline):
+                continue
+            if not options['dry_run']:
+                if self.is_referenced(name) or self.is_fresh(name, deadline):
+                    continue
+                content_storage.delete(name)
+            self.stdout.write(name)
+            deleted += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Unreferenced files {"found" if options["dry_run"] else "deleted"}'
+            f': {deleted}.'
+        ))
+
+    def is_fresh(self, name, deadline):
+        """Файл моложе грейс-периода: загружен или загружен повторно."""
+        return content_storage.get_modified_time(name) > deadline
+
+    def is_referenced(self, name):
+        """
+        Повторная проверка перед удалением: пока шел обход, файл
+        мог снова понадобиться новому рецепту.
+        """
+        return (
+            Recipe.objects.filter(image=name).exists()
+            or RecipeImageVariant.objects.filter(image=name).exists()
+        )
+
+    def walk(self, path):
+        if not content_storage.exists(path):
+            return
+        directories, files = content_storage.listdir(path)
+        for file_name in files:
+            yield posixpath.join(path, file_name)
+        for directory in directories:
+            yield from self.walk(posixpath.join(path, directory))
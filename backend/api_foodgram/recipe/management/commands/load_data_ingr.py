@@ -1,34 +1,110 @@
 import csv
+import json
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from recipe.ingredient_index import ingredient_index
 from recipe.models import Ingredients
 
+CSV_HEADER = ['name', 'measurement_unit']
+NAME_LENGTH = Ingredients._meta.get_field('name').max_length
+UNIT_LENGTH = Ingredients._meta.get_field('measurement_unit').max_length
+
+
+def read_csv(path):
+    """Строки name,measurement_unit; заголовок необязателен."""
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        for row in csv.reader(csvfile, delimiter=','):
+            if row != CSV_HEADER:
+                yield row[:2]
+
+
+def read_json(path):
+    """Список объектов с ключами name и measurement_unit."""
+    with open(path, encoding='utf-8') as jsonfile:
+        for item in json.load(jsonfile):
+            yield [item.get('name'), item.get('measurement_unit')]
+
+
+def clean(row):
+    """Пара (название, единица) или None для некорректной строки."""
+    if len(row) < 2 or not all(isinstance(value, str) for value in row):
+        return None
+    name, measurement_unit = (value.strip() for value in row)
+    if (
+        not name or not measurement_unit
+        or name == measurement_unit
+        or len(name) > NAME_LENGTH
+        or len(measurement_unit) > UNIT_LENGTH
+    ):
+        return None
+    return name, measurement_unit
+
 
 class Command(BaseCommand):
-    help = 'Add csv files to Django Models.'
+    help = 'Load ingredients from a csv or json file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Path to ingredients.csv or ingredients.json.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Ingredients per INSERT.'
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = read_json if path.endswith('.json') else read_csv
         try:
-            with open(
-                'ingredients.csv',
-                newline='',
-                encoding='utf-8'
-            ) as csvfile:
-                spamreader = csv.reader(csvfile, delimiter=',')
-                next(spamreader)
-                for row in spamreader:
-                    if not Ingredients.objects.filter(name=row[0]):
-                        Ingredients.objects.update_or_create(
-                            name=row[0],
-                            measurement_unit=row[1]
-                        )
-                self.stdout.write(self.style.SUCCESS('Ingredients saved.'))
-        except FileNotFoundError as error:
-            raise CommandError(
-                f"Неудалось открыть файл Ingredients.csv. {error}"
-            )
-        except Exception as error:
-            raise CommandError(
-                f"Неудалось записать модель Ingredients. {error}"
+            inserted, skipped, conflicting = self.load(
+                reader(path), options['batch_size']
             )
+        except FileNotFoundError as error:
+            raise CommandError(f'Не удалось открыть файл {path}. {error}')
+        except (csv.Error, ValueError, AttributeError, TypeError) as error:
+            raise CommandError(f'Не удалось прочитать файл {path}. {error}')
+        ingredient_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ingredients inserted: {inserted}, skipped: {skipped}, '
+            f'conflicting: {conflicting}.'
+        ))
+
+    def load(self, rows, batch_size):
+        """
+        Вставка пачками по batch_size в одной транзакции.
+        Уже существующие пары (название, единица) пропускает
+        уникальный индекс, их число - разница между отправленными
+        и вставленными строками.
+        """
+        seen = set()
+        skipped = sent = 0
+        with transaction.atomic():
+            before = Ingredients.objects.count()
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                batch = []
+                for row in chunk:
+                    ingredient = clean(row)
+                    if ingredient is None or ingredient in seen:
+                        skipped += 1
+                        continue
+                    seen.add(ingredient)
+                    batch.append(ingredient)
+                Ingredients.objects.bulk_create(
+                    (
+                        Ingredients(name=name, measurement_unit=unit)
+                        for name, unit in batch
+                    ),
+                    ignore_conflicts=True
+                )
+                sent += len(batch)
+            inserted = Ingredients.objects.count() - before
+        return inserted, skipped, sent - inserted
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from api_foodgram import settings
+from recipe.models import PopularRecipe, RecipeActivity
+
+
+class Command(BaseCommand):
+    help = 'Roll up recipe activity into popularity rankings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=settings.POPULAR_RECIPES_LIMIT,
+            help='Recipes stored per window and metric.'
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        rankings = [
+            PopularRecipe(
+                window=window, metric=metric, rank=rank,
+                recipe_id=row['recipe'], score=row['score']
+            )
+            for window, days in settings.POPULAR_WINDOWS.items()
+            for metric in settings.POPULAR_METRICS
+            for rank, row in enumerate(
+                self.top(today - timedelta(days=days - 1), metric,
+                         options['limit']),
+                start=1
+            )
+        ]
+        with transaction.atomic():
+            PopularRecipe.objects.all().delete()
+            PopularRecipe.objects.bulk_create(rankings)
+        stale, _ = RecipeActivity.objects.filter(
+            day__lt=today - timedelta(
+                days=max(settings.POPULAR_WINDOWS.values())
+            )
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Popular recipes rebuilt: {len(rankings)}, '
+            f'old activity rows removed: {stale}.'
+        ))
+
+    def top(self, since, metric, limit):
+        """Лучшие рецепты по сумме metric начиная с дня since."""
+        return RecipeActivity.objects.filter(day__gte=since).values(
+            'recipe'
+        ).annotate(score=Sum(metric)).filter(
+            score__gt=0
+        ).order_by('-score', 'recipe')[:limit]
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipe.models import Favorite, Recipe, ShoppingCart
+
+
+def count_links(model):
+    """Число строк промежуточной таблицы model на каждый рецепт."""
+    return Coalesce(
+        Subquery(
+            model.recipe.through.objects.filter(
+                recipe=OuterRef('pk')
+            ).values('recipe').annotate(total=Count('pk')).values('total')
+        ),
+        Value(0)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount favorites and shopping cart counters of recipes '
+        'after bulk loads that bypass the ORM, such as seed_scale.'
+    )
+
+    def handle(self, *args, **options):
+        updated = Recipe.objects.update(
+            favorites_count=count_links(Favorite),
+            in_carts_count=count_links(ShoppingCart),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Recipe counters recounted: {updated}.')
+        )
@@ -0,0 +1,341 @@
+import csv
+import io
+import random
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api_foodgram import settings
+from recipe.ingredient_index import ingredient_index
+from recipe.models import (FeedEntry, Favorite, Ingredients,
+                           IngredientsAmount, Recipe, RecipeActivity,
+                           ShoppingCart, Tag)
+from users.models import CustomUser, Subscribe
+
+SEED_TAGS = (
+    ('Завтрак', 'breakfast', '#E26C2D'),
+    ('Обед', 'lunch', '#49B64E'),
+    ('Ужин', 'dinner', '#8775D2'),
+)
+SEED_INGREDIENTS = 2000
+SEED_UNITS = ('г', 'шт', 'мл')
+SEED_IMAGE = 'recipes/seed.png'
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса Zipf: элемент с рангом r весит 1 / r ** exponent."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset for performance '
+        'testing: users, recipes, ingredients, favorites, carts, '
+        'subscriptions and feeds with Zipf-distributed popularity, '
+        'then build the derived popular and similar recipe tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=10,
+            help='Average ingredients per recipe.'
+        )
+        parser.add_argument(
+            '--favorites-per-user', type=int, default=20,
+            help='Average favorites per user.'
+        )
+        parser.add_argument(
+            '--carts-per-user', type=int, default=5,
+            help='Average shopping cart recipes per user.'
+        )
+        parser.add_argument(
+            '--subscriptions-per-user', type=int, default=10,
+            help='Average subscriptions per user.'
+        )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Zipf exponent of recipe, author and ingredient popularity.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=10_000,
+            help='Rows per bulk_create or COPY chunk.'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        # Дни активности берутся из отдельного генератора, чтобы
+        # остальные данные для того же seed не менялись.
+        self.days = random.Random(options['seed'])
+        self.prefix = f'seed{options["seed"]}'
+        if CustomUser.objects.filter(
+            username__startswith=f'{self.prefix}_'
+        ).exists():
+            raise CommandError(
+                f'Данные с seed={options["seed"]} уже загружены.'
+            )
+        with transaction.atomic():
+            tags = self.seed_tags()
+            ingredients = self.seed_ingredients()
+            users = self.seed_users(options['users'])
+            recipes = self.seed_recipes(users, options)
+            self.seed_recipe_links(recipes, tags, ingredients, options)
+            own_recipes = self.seed_user_links(users, recipes, options)
+            self.seed_feed(own_recipes)
+        ingredient_index.invalidate()
+        call_command('recipe_counters', stdout=self.stdout)
+        call_command('cart_totals', stdout=self.stdout)
+        call_command('popular_recipes', stdout=self.stdout)
+        call_command('similar_recipes', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Synthetic dataset generated.'))
+
+    def insert(self, model, fields, rows):
+        """
+        Пакетная вставка строк-кортежей в порядке fields:
+        COPY в PostgreSQL, bulk_create в остальных базах.
+        """
+        rows = iter(rows)
+        fields = [model._meta.get_field(field) for field in fields]
+        columns = [field.column for field in fields]
+        attnames = [field.attname for field in fields]
+        total = 0
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        f'COPY {model._meta.db_table} '
+                        f'({", ".join(columns)}) FROM STDIN WITH CSV',
+                        buffer
+                    )
+            else:
+                model.objects.bulk_create(
+                    model(**dict(zip(attnames, row))) for row in chunk
+                )
+            total += len(chunk)
+        self.stdout.write(f'{model._meta.db_table}: {total}')
+
+    def seed_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, slug=slug, hex_code=hex_code)
+                for name, slug, hex_code in SEED_TAGS
+            )
+        return list(Tag.objects.order_by('pk').values_list('pk', flat=True))
+
+    def seed_ingredients(self):
+        if not Ingredients.objects.exists():
+            self.insert(
+                Ingredients,
+                ('name', 'measurement_unit'),
+                (
+                    (f'ингредиент {number}', self.random.choice(SEED_UNITS))
+                    for number in range(SEED_INGREDIENTS)
+                )
+            )
+        return list(
+            Ingredients.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+    def seed_users(self, count):
+        password = make_password(None)
+        self.insert(
+            CustomUser,
+            ('username', 'email', 'password', 'first_name', 'last_name',
+             'is_active', 'is_staff', 'is_superuser', 'is_blocked',
+             'date_joined'),
+            (
+                (f'{self.prefix}_user{number}',
+                 f'{self.prefix}_user{number}@example.com',
+                 password, 'Имя', 'Фамилия',
+                 True, False, False, False, '2022-01-01T00:00:00Z')
+                for number in range(count)
+            )
+        )
+        return list(
+            CustomUser.objects.filter(
+                username__startswith=f'{self.prefix}_'
+            ).order_by('pk').values_list('pk', flat=True)
+        )
+
+    def seed_recipes(self, users, options):
+        authors = self.random.choices(
+            users,
+            cum_weights=zipf_weights(len(users), options['zipf']),
+            k=options['recipes']
+        )
+        self.insert(
+            Recipe,
+            ('author', 'name', 'image', 'description', 'cooking_time',
+             'favorites_count', 'in_carts_count'),
+            (
+                (author, f'{self.prefix} рецепт {number}', SEED_IMAGE,
+                 f'Описание рецепта {number}', self.random.randint(1, 180),
+                 0, 0)
+                for number, author in enumerate(authors)
+            )
+        )
+        return list(
+            Recipe.objects.filter(
+                name__startswith=f'{self.prefix} '
+            ).order_by('pk').values_list('pk', flat=True)
+        )
+
+    def sample(self, population, cum_weights, average, exclude=()):
+        """
+        От 1 до 2 * average разных элементов с весами Zipf, кроме
+        exclude. Повторы добираются новыми выборками, поэтому
+        в среднем выходит average элементов.
+        """
+        size = min(
+            self.random.randint(1, 2 * average),
+            len(population) - len(exclude)
+        )
+        picked = set()
+        while len(picked) < size:
+            picked.update(self.random.choices(
+                population, cum_weights=cum_weights, k=size - len(picked)
+            ))
+            picked.difference_update(exclude)
+        return sorted(picked)
+
+    def seed_recipe_links(self, recipes, tags, ingredients, options):
+        weights = zipf_weights(len(ingredients), options['zipf'])
+        self.insert(
+            Recipe.tags.through,
+            ('recipe', 'tag'),
+            (
+                (recipe, tag)
+                for recipe in recipes
+                for tag in sorted(self.random.sample(
+                    tags, self.random.randint(1, len(tags))
+                ))
+            )
+        )
+        self.insert(
+            IngredientsAmount,
+            ('recipe', 'ingredients', 'amount'),
+            (
+                (recipe, ingredient, self.random.randint(1, 500))
+                for recipe in recipes
+                for ingredient in self.sample(
+                    ingredients, weights, options['ingredients_per_recipe']
+                )
+            )
+        )
+
+    def seed_user_links(self, users, recipes, options):
+        recipe_weights = zipf_weights(len(recipes), options['zipf'])
+        own_recipes = defaultdict(set)
+        for author, recipe in Recipe.objects.filter(
+            name__startswith=f'{self.prefix} '
+        ).values_list('author', 'pk').iterator():
+            own_recipes[author].add(recipe)
+        authors = sorted(own_recipes)
+        author_weights = zipf_weights(len(authors), options['zipf'])
+        activity = defaultdict(lambda: [0, 0])
+        for metric, (model, average) in enumerate((
+            (Favorite, options['favorites_per_user']),
+            (ShoppingCart, options['carts_per_user']),
+        )):
+            self.insert(model, ('user',), ((user,) for user in users))
+            containers = dict(
+                model.objects.filter(
+                    user__username__startswith=f'{self.prefix}_'
+                ).values_list('user', 'pk')
+            )
+            self.insert(
+                model.recipe.through,
+                (model.recipe.field.m2m_field_name(), 'recipe'),
+                (
+                    (containers[user], self.record(activity, recipe, metric))
+                    for user in users
+                    for recipe in self.sample(
+                        recipes, recipe_weights, average,
+                        exclude=own_recipes[user]
+                    )
+                )
+            )
+        self.insert(
+            RecipeActivity,
+            ('recipe', 'day', 'favorites', 'carts'),
+            (
+                (recipe, day, favorites, carts)
+                for (recipe, day), (favorites, carts) in sorted(
+                    activity.items()
+                )
+            )
+        )
+        self.insert(
+            Subscribe,
+            ('user', 'author'),
+            (
+                (user, author)
+                for user in users
+                for author in self.sample(
+                    authors, author_weights,
+                    options['subscriptions_per_user'], exclude={user}
+                )
+            )
+        )
+        return own_recipes
+
+    def record(self, activity, recipe, metric):
+        """
+        Добавление рецепта в избранное (metric 0) или список покупок
+        (metric 1) в случайный день самого длинного окна рейтинга.
+        """
+        day = timezone.localdate() - timedelta(
+            days=self.days.randrange(max(settings.POPULAR_WINDOWS.values()))
+        )
+        activity[recipe, day][metric] += 1
+        return recipe
+
+    def seed_feed(self, own_recipes):
+        """
+        Ленты подписчиков, как их заполняет миграция 0011: последние
+        рецепты каждого автора, у которого подписчиков не больше
+        FEED_FANOUT_LIMIT. Рецепты популярных авторов лента читает сама.
+        """
+        authors = Subscribe.objects.filter(
+            author__username__startswith=f'{self.prefix}_'
+        ).values('author').annotate(
+            followers=Count('pk')
+        ).filter(
+            followers__lte=settings.FEED_FANOUT_LIMIT
+        ).values('author')
+        latest = {
+            author: sorted(recipes, reverse=True)[
+                :settings.FEED_BACKFILL_LIMIT
+            ]
+            for author, recipes in own_recipes.items()
+        }
+        self.insert(
+            FeedEntry,
+            ('user', 'recipe'),
+            (
+                (user, recipe)
+                for user, author in Subscribe.objects.filter(
+                    user__username__startswith=f'{self.prefix}_',
+                    author__in=authors
+                ).order_by('author', 'user').values_list(
+                    'user', 'author'
+                ).iterator()
+                for recipe in latest[author]
+            )
+        )
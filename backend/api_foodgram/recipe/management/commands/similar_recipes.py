@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api_foodgram import settings
+from recipe.similarity import build_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the similar recipes index from recipe ingredients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--block-nnz',
+            type=int,
+            default=settings.SIMILAR_RECIPES_BLOCK_NNZ,
+            help='Estimated non-zeros per block of the sparse matrix product.'
+        )
+        parser.add_argument(
+            '--max-df',
+            type=int,
+            default=settings.SIMILAR_RECIPES_MAX_DF,
+            help='Ignore ingredients used by more recipes than this.'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=settings.SIMILAR_RECIPES_LIMIT,
+            help='Similar recipes stored per recipe.'
+        )
+
+    def handle(self, *args, **options):
+        written = build_similar_recipes(
+            options['block_nnz'], options['limit'], options['max_df']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Similar recipes rebuilt: {written}.')
+        )
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:59
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def fill_shopping_cart_totals(apps, schema_editor):
+    IngredientsAmount = apps.get_model('recipe', 'IngredientsAmount')
+    ShoppingCartTotal = apps.get_model('recipe', 'ShoppingCartTotal')
+    totals = IngredientsAmount.objects.filter(
+        recipe__in_shopping_cart__isnull=False
+    ).values(
+        'recipe__in_shopping_cart__user', 'ingredients'
+    ).annotate(total=Sum('amount')).order_by()
+    ShoppingCartTotal.objects.bulk_create(
+        ShoppingCartTotal(
+            user_id=row['recipe__in_shopping_cart__user'],
+            ingredients_id=row['ingredients'],
+            amount=row['total'],
+        )
+        for row in totals.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipe', '0002_alter_ingredientsamount_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredientsamount',
+            name='amount',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(0, message='Минимальное количество не может быть < 0.'), django.core.validators.MaxValueValidator(100000, message='Не ну 100-чка это перебор.')], verbose_name='Количество'),
+        ),
+        migrations.CreateModel(
+            name='ShoppingCartTotal',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredients', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_totals', to='recipe.Ingredients', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart_totals', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Сумма в списке покупок',
+                'verbose_name_plural': 'Суммы в списках покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcarttotal',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredients'), name='unique_shopping_cart_total'),
+        ),
+        migrations.RunPython(
+            fill_shopping_cart_totals, migrations.RunPython.noop
+        ),
+    ]
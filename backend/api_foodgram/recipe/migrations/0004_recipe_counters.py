@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_links(through):
+    return Coalesce(
+        Subquery(
+            through.objects.filter(recipe=OuterRef('pk')).values(
+                'recipe'
+            ).annotate(total=Count('pk')).values('total')
+        ),
+        Value(0)
+    )
+
+
+def fill_recipe_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    Favorite = apps.get_model('recipe', 'Favorite')
+    ShoppingCart = apps.get_model('recipe', 'ShoppingCart')
+    Recipe.objects.update(
+        favorites_count=count_links(Favorite.recipe.through),
+        in_carts_count=count_links(ShoppingCart.recipe.through),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0003_shoppingcarttotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(
+            fill_recipe_counters, migrations.RunPython.noop
+        ),
+    ]
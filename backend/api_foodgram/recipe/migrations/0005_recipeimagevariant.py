@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30, verbose_name='Вариант')),
+                ('source', models.CharField(max_length=255, verbose_name='Оригинал')),
+                ('image', models.ImageField(upload_to='recipes/variants/', verbose_name='Изображение')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='recipe.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Вариант изображения',
+                'verbose_name_plural': 'Варианты изображений',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeimagevariant',
+            constraint=models.UniqueConstraint(fields=('recipe', 'kind'), name='unique_recipe_image_variant'),
+        ),
+    ]
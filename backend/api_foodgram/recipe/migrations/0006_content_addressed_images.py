@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:04
+
+from django.db import migrations, models
+import recipe.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_recipeimagevariant'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipe.storage.ContentAddressedStorage(), upload_to='recipes/', verbose_name='Изображение блюда'),
+        ),
+        migrations.AlterField(
+            model_name='recipeimagevariant',
+            name='image',
+            field=models.ImageField(storage=recipe.storage.ContentAddressedStorage(), upload_to='recipes/variants/', verbose_name='Изображение'),
+        ),
+    ]
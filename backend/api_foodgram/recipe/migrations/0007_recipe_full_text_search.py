@@ -0,0 +1,104 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:06
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+POSTGRES_FORWARD = (
+    """
+    CREATE FUNCTION recipe_search_vector_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+            || setweight(
+                to_tsvector('russian', coalesce(NEW.description, '')), 'B'
+            );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER recipe_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON recipe_recipe
+    FOR EACH ROW EXECUTE PROCEDURE recipe_search_vector_trigger();
+    """,
+    'UPDATE recipe_recipe SET name = name;',
+    """
+    CREATE INDEX recipe_search_vector_idx
+    ON recipe_recipe USING gin (search_vector);
+    """,
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX IF EXISTS recipe_search_vector_idx;',
+    'DROP TRIGGER IF EXISTS recipe_search_vector_update ON recipe_recipe;',
+    'DROP FUNCTION IF EXISTS recipe_search_vector_trigger();',
+)
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE recipe_recipe_fts USING fts5(
+        name, description, content='recipe_recipe', content_rowid='id'
+    );
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_insert AFTER INSERT ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_delete AFTER DELETE ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts(
+            recipe_recipe_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+    END;
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_update
+    AFTER UPDATE OF name, description ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts(
+            recipe_recipe_fts, rowid, name, description
+        ) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO recipe_recipe_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END;
+    """,
+    "INSERT INTO recipe_recipe_fts(recipe_recipe_fts) VALUES ('rebuild');",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_insert;',
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_delete;',
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_update;',
+    'DROP TABLE IF EXISTS recipe_recipe_fts;',
+)
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgres,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, ())
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0006_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_recipe_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredientsamount',
+            index=models.Index(fields=['ingredients', 'recipe'], name='ingredients_recipe_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('favorites', models.IntegerField(default=0, verbose_name='В избранном')),
+                ('carts', models.IntegerField(default=0, verbose_name='В списках покупок')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipe.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.CreateModel(
+            name='PopularRecipe',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=10, verbose_name='Окно')),
+                ('metric', models.CharField(max_length=20, verbose_name='Метрика')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.IntegerField(verbose_name='Счет')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popular', to='recipe.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Популярный рецепт',
+                'verbose_name_plural': 'Популярные рецепты',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipeactivity',
+            index=models.Index(fields=['day'], name='recipe_activity_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'day'), name='unique_recipe_activity'),
+        ),
+        migrations.AddConstraint(
+            model_name='popularrecipe',
+            constraint=models.UniqueConstraint(fields=('window', 'metric', 'rank'), name='unique_popular_recipe'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_feed(apps, schema_editor):
+    FeedEntry = apps.get_model('recipe', 'FeedEntry')
+    Recipe = apps.get_model('recipe', 'Recipe')
+    Subscribe = apps.get_model('users', 'Subscribe')
+    authors = Subscribe.objects.values('author').annotate(
+        followers=Count('pk')
+    ).filter(followers__lte=settings.FEED_FANOUT_LIMIT).values_list(
+        'author', flat=True
+    )
+    for author in authors.iterator():
+        recipes = list(
+            Recipe.objects.filter(author=author).order_by(
+                '-pk'
+            ).values_list('pk', flat=True)[:settings.FEED_BACKFILL_LIMIT]
+        )
+        FeedEntry.objects.bulk_create(
+            FeedEntry(user_id=user, recipe_id=recipe)
+            for user in Subscribe.objects.filter(
+                author=author
+            ).values_list('user', flat=True).iterator()
+            for recipe in recipes
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipe', '0010_recipe_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipe.Recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_feedentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredientsamount',
+            name='ingredients',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ingredientsamount_set', to='recipe.Ingredients', verbose_name='Ингредиент'),
+        ),
+    ]
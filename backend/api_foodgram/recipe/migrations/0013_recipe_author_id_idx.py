@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0012_ingredientsamount_drop_ingredients_fk_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', 'id'], name='recipe_author_id_idx'),
+        ),
+    ]
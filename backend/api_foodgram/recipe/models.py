@@ -1,9 +1,13 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from users.models import CustomUser
+from .storage import content_storage
 
 
 def validate_hex(value):
@@ -56,6 +60,7 @@ class IngredientsAmount(models.Model):
         Ingredients,
         on_delete=models.CASCADE,
         related_name='ingredientsamount_set',
+        db_index=False,
         verbose_name='Ингредиент'
     )
     amount = models.PositiveSmallIntegerField(
@@ -72,6 +77,14 @@ class IngredientsAmount(models.Model):
         ]
     )
 
+    class Meta:
+        # Индекс начинается с ingredients и заменяет индекс внешнего ключа.
+        indexes = [
+            models.Index(
+                fields=('ingredients', 'recipe',),
+                name='ingredients_recipe_idx'),
+        ]
+
     def __str__(self):
         return (
             f'{self.ingredients.name}: {self.amount}'
@@ -129,6 +142,8 @@ class Recipe(models.Model):
         verbose_name='Название блюда'
     )
     image = models.ImageField(
+        upload_to='recipes/',
+        storage=content_storage,
         verbose_name='Изображение блюда'
     )
     description = models.TextField(verbose_name='Описание')
@@ -145,6 +160,23 @@ class Recipe(models.Model):
             )
         ]
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
 
     class Meta:
         constraints = [
@@ -152,6 +184,10 @@ class Recipe(models.Model):
                 fields=('author', 'name',),
                 name='unique_recipe'),
         ]
+        # Последние рецепты автора по ключу id для ленты подписок.
+        indexes = [
+            models.Index(fields=('author', 'id',), name='recipe_author_id_idx'),
+        ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
@@ -159,6 +195,72 @@ class Recipe(models.Model):
         return self.name
 
 
+class RecipeImageVariant(models.Model):
+    """
+    Уменьшенная копия изображения рецепта. Строится в фоне
+    по оригиналу source и актуальна, пока source совпадает
+    с текущим изображением рецепта.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Рецепт'
+    )
+    kind = models.CharField(max_length=30, verbose_name='Вариант')
+    source = models.CharField(max_length=255, verbose_name='Оригинал')
+    image = models.ImageField(
+        upload_to='recipes/variants/',
+        storage=content_storage,
+        verbose_name='Изображение'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'kind',),
+                name='unique_recipe_image_variant'),
+        ]
+        verbose_name = 'Вариант изображения'
+        verbose_name_plural = 'Варианты изображений'
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.kind}'
+
+
+class SimilarRecipe(models.Model):
+    """
+    Заранее посчитанный похожий рецепт: score - коэффициент
+    Жаккара по наборам ингредиентов двух рецептов без самых частых,
+    которые встречаются больше чем в SIMILAR_RECIPES_MAX_DF рецептах.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'similar',),
+                name='unique_similar_recipe'),
+        ]
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.similar_id}: {self.score:.2f}'
+
+
 class Favorite(models.Model):
     """Модель Избранного."""
     user = models.OneToOneField(
@@ -193,3 +295,257 @@ class ShoppingCart(models.Model):
 
     def __str__(self) -> str:
         return f"{self.recipe.name} в списке покупок у {self.user.username}"
+
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+def release_recipe_counters(sender, instance, **kwargs):
+    """
+    Избранное или список покупок удаляется, обычно вместе
+    с пользователем: строки промежуточной таблицы удалятся без
+    сигналов, поэтому счетчики рецептов уменьшаются здесь.
+    """
+    counter = RECIPE_COUNTERS[sender]
+    Recipe.objects.filter(
+        pk__in=sender.recipe.through.objects.filter(
+            **{sender.recipe.field.m2m_field_name(): instance}
+        ).values('recipe')
+    ).update(**{counter: F(counter) - 1})
+
+
+class ShoppingCartTotalManager(models.Manager):
+    """Пересчет сводного списка покупок."""
+
+    def calculate(self, users, ingredients=None, exclude_recipe=None):
+        """
+        Суммы ингредиентов из списков покупок, посчитанные по рецептам,
+        без рецепта exclude_recipe, если он передан.
+        """
+        amounts = IngredientsAmount.objects.filter(
+            recipe__in_shopping_cart__user__in=users
+        )
+        if ingredients is not None:
+            amounts = amounts.filter(ingredients__in=ingredients)
+        if exclude_recipe is not None:
+            amounts = amounts.exclude(recipe=exclude_recipe)
+        return amounts.values(
+            'recipe__in_shopping_cart__user', 'ingredients'
+        ).annotate(total=Sum('amount')).order_by()
+
+    def refresh(self, users, ingredients=None, exclude_recipe=None,
+                lock=True):
+        """
+        Пересчет строк пользователей users, при переданном ingredients
+        только по этим ингредиентам. users - список id или подзапрос.
+        Списки покупок пользователей блокируются до конца транзакции
+        в порядке pk, чтобы параллельные пересчеты пересекающихся
+        наборов ждали друг друга, а не взаимно блокировались;
+        lock=False - списки уже заблокированы вызывающим кодом.
+        """
+        with transaction.atomic(savepoint=False):
+            if lock:
+                list(
+                    ShoppingCart.objects.select_for_update().filter(
+                        user__in=users
+                    ).order_by('pk').values_list('pk', flat=True)
+                )
+            stale = self.filter(user__in=users)
+            if ingredients is not None:
+                stale = stale.filter(ingredients__in=ingredients)
+            stale.delete()
+            self.bulk_create(
+                self.model(
+                    user_id=row['recipe__in_shopping_cart__user'],
+                    ingredients_id=row['ingredients'],
+                    amount=row['total'],
+                )
+                for row in self.calculate(users, ingredients, exclude_recipe)
+            )
+
+    def cart_users(self, recipe):
+        """Подзапрос пользователей, у которых рецепт в списке покупок."""
+        return ShoppingCart.objects.filter(recipe=recipe).values('user')
+
+    def refresh_for_recipe(self, recipe, ingredients, exclude_recipe=False):
+        """
+        Пересчет у всех, у кого рецепт в списке покупок;
+        с exclude_recipe - без вклада самого рецепта.
+        """
+        users = self.cart_users(recipe)
+        if users.exists():
+            self.refresh(
+                users, ingredients, recipe if exclude_recipe else None
+            )
+
+
+class ShoppingCartTotal(models.Model):
+    """
+    Сводный список покупок: сумма каждого ингредиента по всем
+    рецептам из списка покупок пользователя. Обновляется при
+    изменении списка покупок и ингредиентов входящих в него рецептов.
+    """
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_totals',
+        verbose_name='Пользователь',
+    )
+    ingredients = models.ForeignKey(
+        Ingredients,
+        on_delete=models.CASCADE,
+        related_name='shopping_cart_totals',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(verbose_name='Количество')
+
+    objects = ShoppingCartTotalManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredients',),
+                name='unique_shopping_cart_total'),
+        ]
+        verbose_name = 'Сумма в списке покупок'
+        verbose_name_plural = 'Суммы в списках покупок'
+
+    def __str__(self):
+        return f'{self.ingredients.name}: {self.amount} у {self.user.username}'
+
+
+def refresh_totals_for_amount(sender, instance, **kwargs):
+    """
+    Ингредиент рецепта сохранен или удален, в том числе из админки.
+    При удалении самого рецепта строки списков покупок к этому
+    моменту уже удалены, и пересчет делает refresh_totals_for_recipe.
+    """
+    ShoppingCartTotal.objects.refresh_for_recipe(
+        instance.recipe_id, (instance.ingredients_id,)
+    )
+
+
+def refresh_totals_for_recipe(sender, instance, **kwargs):
+    """
+    Рецепт удаляется: пока строки списков покупок на месте, суммы
+    их владельцев пересчитываются без этого рецепта в той же транзакции.
+    """
+    ShoppingCartTotal.objects.refresh_for_recipe(
+        instance,
+        instance.ingredientsamount_set.values('ingredients'),
+        exclude_recipe=True
+    )
+
+
+class RecipeActivityManager(models.Manager):
+    """Учет добавлений в избранное и списки покупок по дням."""
+
+    def record(self, recipes, field, delta):
+        """
+        Сдвиг счетчика field за сегодня на delta: недостающие
+        строки дня создаются, затем счетчик меняется одним UPDATE.
+        """
+        day = timezone.localdate()
+        self.bulk_create(
+            (self.model(recipe_id=pk, day=day) for pk in recipes),
+            ignore_conflicts=True
+        )
+        self.filter(recipe__in=recipes, day=day).update(
+            **{field: F(field) + delta}
+        )
+
+
+class RecipeActivity(models.Model):
+    """
+    Изменение числа добавлений рецепта в избранное
+    и списки покупок за один день.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Рецепт'
+    )
+    day = models.DateField(verbose_name='День')
+    favorites = models.IntegerField(default=0, verbose_name='В избранном')
+    carts = models.IntegerField(default=0, verbose_name='В списках покупок')
+
+    objects = RecipeActivityManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'day',),
+                name='unique_recipe_activity'),
+        ]
+        indexes = [
+            models.Index(fields=('day',), name='recipe_activity_day_idx'),
+        ]
+        verbose_name = 'Активность по рецепту'
+        verbose_name_plural = 'Активность по рецептам'
+
+    def __str__(self):
+        return f'{self.recipe_id} за {self.day}'
+
+
+class PopularRecipe(models.Model):
+    """
+    Место рецепта в рейтинге по метрике metric
+    (favorites или carts) за окно window, например 7d.
+    """
+    window = models.CharField(max_length=10, verbose_name='Окно')
+    metric = models.CharField(max_length=20, verbose_name='Метрика')
+    rank = models.PositiveIntegerField(verbose_name='Место')
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='popular',
+        verbose_name='Рецепт'
+    )
+    score = models.IntegerField(verbose_name='Счет')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('window', 'metric', 'rank',),
+                name='unique_popular_recipe'),
+        ]
+        verbose_name = 'Популярный рецепт'
+        verbose_name_plural = 'Популярные рецепты'
+
+    def __str__(self):
+        return f'{self.window} {self.metric} #{self.rank}: {self.recipe_id}'
+
+
+class FeedEntry(models.Model):
+    """
+    Строка ленты подписок: рецепт автора, на которого подписан
+    пользователь. Пишется при публикации рецепта.
+    """
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe',),
+                name='unique_feed_entry'),
+        ]
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+    def __str__(self):
+        return f'{self.recipe_id} в ленте {self.user_id}'
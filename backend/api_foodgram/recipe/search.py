@@ -0,0 +1,39 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+SEARCH_RANK = 'search_rank'
+FTS_TABLE = 'recipe_recipe_fts'
+
+
+def search_recipes(queryset, text):
+    """
+    Полнотекстовый поиск по названию и описанию рецепта
+    с сортировкой по релевантности: в Postgres по search_vector
+    с GIN-индексом, в SQLite по таблице FTS5 recipe_recipe_fts.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            **{SEARCH_RANK: SearchRank(F('search_vector'), query)}
+        ).order_by(f'-{SEARCH_RANK}', '-pk')
+    words = re.findall(r'\w+', text)
+    if not words:
+        return queryset.none()
+    match = ' '.join(f'"{word}"*' for word in words)
+    return queryset.extra(
+        where=[
+            f'recipe_recipe.id IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+        ],
+        params=[match]
+    ).annotate(**{SEARCH_RANK: RawSQL(
+        f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = recipe_recipe.id',
+        (match,),
+        output_field=FloatField()
+    )}).order_by(f'-{SEARCH_RANK}', '-pk')
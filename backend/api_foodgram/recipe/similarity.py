@@ -0,0 +1,212 @@
+from collections import defaultdict
+from itertools import chain
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from scipy import sparse
+
+from api_foodgram import settings
+from .models import IngredientsAmount, Recipe, SimilarRecipe
+
+
+COMMON_INGREDIENTS_KEY = 'similar_common_ingredients'
+
+
+def common_ingredients():
+    """
+    Id ингредиентов, которые встречаются больше чем
+    в SIMILAR_RECIPES_MAX_DF рецептах. Их кладет в кэш полная
+    перестройка, при промахе они считаются одним GROUP BY.
+    """
+    common = cache.get(COMMON_INGREDIENTS_KEY)
+    if common is None:
+        common = set(
+            row['ingredients']
+            for row in IngredientsAmount.objects.values(
+                'ingredients'
+            ).annotate(
+                recipes=Count('recipe', distinct=True)
+            ).filter(
+                recipes__gt=settings.SIMILAR_RECIPES_MAX_DF
+            ).order_by()
+        )
+        cache.set(
+            COMMON_INGREDIENTS_KEY, common,
+            settings.SIMILAR_COMMON_INGREDIENTS_TTL
+        )
+    return common
+
+
+def ingredient_matrix(max_df):
+    """
+    Бинарная разреженная матрица рецепт x ингредиент, id рецептов
+    в порядке ее строк и число рецептов с каждым ингредиентом.
+    Ингредиенты, которые встречаются больше чем в max_df рецептах,
+    в матрицу не попадают.
+    """
+    pairs = IngredientsAmount.objects.values_list(
+        'recipe', 'ingredients'
+    ).distinct().order_by()
+    pairs = np.fromiter(
+        chain.from_iterable(pairs.iterator()), dtype=np.int64
+    ).reshape(-1, 2)
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    ingredient_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    frequency = np.bincount(cols, minlength=len(ingredient_ids))
+    kept = frequency[cols] <= max_df
+    matrix = sparse.csr_matrix(
+        (
+            np.ones(np.count_nonzero(kept), dtype=np.float32),
+            (rows[kept], cols[kept])
+        ),
+        shape=(len(recipe_ids), len(ingredient_ids))
+    )
+    return recipe_ids, ingredient_ids, matrix, frequency
+
+
+def row_blocks(work, budget):
+    """
+    Границы блоков строк, в каждом из которых сумма work
+    не больше budget; строка тяжелее budget идет отдельным блоком.
+    """
+    bounds = np.cumsum(work)
+    start = 0
+    while start < len(work):
+        done = bounds[start - 1] if start else 0
+        stop = int(np.searchsorted(bounds, done + budget, side='right'))
+        stop = max(stop, start + 1)
+        yield start, stop
+        start = stop
+
+
+def top_similar(matrix, sizes, start, stop, limit):
+    """
+    Лучшие limit соседей по Жаккару для строк start:stop.
+    Пересечения наборов считаются одним умножением разреженных
+    матриц на блок, отбор top-k - сортировкой без циклов по строкам.
+    """
+    common = (matrix[start:stop] @ matrix.T).tocoo()
+    rows = common.row + start
+    other = rows != common.col
+    rows, cols = rows[other], common.col[other]
+    common = common.data[other].astype(np.float64)
+    scores = common / (sizes[rows] + sizes[cols] - common)
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    best = rank < limit
+    return rows[best], cols[best], scores[best]
+
+
+def build_similar_recipes(block_nnz=None, limit=None, max_df=None):
+    """
+    Полная перестройка таблицы похожих рецептов по наборам
+    ингредиентов без самых частых. Строки делятся на блоки так,
+    чтобы произведение блока на матрицу держало не больше block_nnz
+    ненулевых элементов: оценка строки - сумма частот ее ингредиентов.
+    Возвращает число записанных пар.
+    """
+    block_nnz = block_nnz or settings.SIMILAR_RECIPES_BLOCK_NNZ
+    limit = limit or settings.SIMILAR_RECIPES_LIMIT
+    max_df = max_df or settings.SIMILAR_RECIPES_MAX_DF
+    recipe_ids, ingredient_ids, matrix, frequency = ingredient_matrix(max_df)
+    sizes = np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+    work = matrix @ np.where(frequency <= max_df, frequency, 0)
+    written = 0
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        for start, stop in row_blocks(work, block_nnz):
+            rows, cols, scores = top_similar(
+                matrix, sizes, start, stop, limit
+            )
+            SimilarRecipe.objects.bulk_create(
+                SimilarRecipe(
+                    recipe_id=int(recipe_ids[row]),
+                    similar_id=int(recipe_ids[col]),
+                    score=float(score)
+                ) for row, col, score in zip(rows, cols, scores)
+            )
+            written += len(rows)
+    cache.set(
+        COMMON_INGREDIENTS_KEY,
+        set(ingredient_ids[frequency > max_df].tolist()),
+        settings.SIMILAR_COMMON_INGREDIENTS_TTL
+    )
+    return written
+
+
+def refresh_similar_recipes(recipe_id):
+    """
+    Пересчет после изменения одного рецепта: его список соседей
+    и его место в списках кандидатов. Кандидаты - не больше
+    SIMILAR_RECIPES_CANDIDATES рецептов с наибольшим числом общих
+    ингредиентов без самых частых, поэтому работа не растет
+    с размером каталога.
+    """
+    limit = settings.SIMILAR_RECIPES_LIMIT
+    common = common_ingredients()
+    ingredients = set(
+        IngredientsAmount.objects.filter(recipe=recipe_id).values_list(
+            'ingredients', flat=True
+        )
+    ) - common
+    candidates = []
+    if ingredients:
+        candidates = [
+            row['recipe']
+            for row in IngredientsAmount.objects.filter(
+                ingredients__in=ingredients
+            ).exclude(recipe=recipe_id).values('recipe').annotate(
+                common=Count('ingredients', distinct=True)
+            ).order_by('-common', 'recipe')[
+                :settings.SIMILAR_RECIPES_CANDIDATES
+            ]
+        ]
+    candidate_ingredients = defaultdict(set)
+    for pk, ingredient in IngredientsAmount.objects.filter(
+        recipe__in=candidates
+    ).values_list('recipe', 'ingredients'):
+        if ingredient not in common:
+            candidate_ingredients[pk].add(ingredient)
+    scores = {}
+    for pk, other in candidate_ingredients.items():
+        shared = len(ingredients & other)
+        scores[pk] = shared / (len(ingredients) + len(other) - shared)
+    with transaction.atomic():
+        if not Recipe.objects.select_for_update().filter(
+            pk=recipe_id
+        ).exists():
+            return
+        SimilarRecipe.objects.filter(
+            Q(recipe=recipe_id) | Q(similar=recipe_id)
+        ).delete()
+        neighbours = defaultdict(list)
+        for row in SimilarRecipe.objects.filter(recipe__in=scores).values(
+            'pk', 'recipe', 'similar', 'score'
+        ):
+            neighbours[row['recipe']].append(row)
+        evicted = []
+        created = [
+            SimilarRecipe(recipe_id=recipe_id, similar_id=pk, score=score)
+            for pk, score in sorted(
+                scores.items(), key=lambda item: (-item[1], item[0])
+            )[:limit]
+        ]
+        for pk, score in scores.items():
+            rows = neighbours[pk]
+            if len(rows) >= limit:
+                worst = min(
+                    rows, key=lambda row: (row['score'], -row['similar'])
+                )
+                if (worst['score'], -worst['similar']) >= (
+                    score, -recipe_id
+                ):
+                    continue
+                evicted.append(worst['pk'])
+            created.append(
+                SimilarRecipe(recipe_id=pk, similar_id=recipe_id, score=score)
+            )
+        SimilarRecipe.objects.filter(pk__in=evicted).delete()
+        SimilarRecipe.objects.bulk_create(created)
@@ -0,0 +1,40 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище, именующее файлы по sha256 содержимого:
+    <upload_to>/<2 символа хэша>/<хэш>.<расширение>.
+    Повторная загрузка того же файла ничего не пишет на диск, только
+    обновляет время изменения, а файл по имени никогда не меняется,
+    поэтому его можно кэшировать бессрочно. Неиспользуемые файлы
+    старше грейс-периода удаляет команда gc_media.
+    """
+
+    def content_name(self, name, content):
+        """Имя, под которым save сохранит content, загруженный как name."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name),
+            digest[:2],
+            digest + os.path.splitext(name)[1].lower()
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipe.ingredient_index import IngredientIndex
+from recipe.models import Ingredients
+
+
+class IngredientIndexTest(TestCase):
+    """
+    Индекс другого процесса (отдельный экземпляр с тем же кэшем)
+    перестраивается после загрузки ингредиентов командой.
+    """
+
+    def setUp(self):
+        cache.clear()
+        Ingredients.objects.create(name='соль', measurement_unit='г')
+        self.worker_index = IngredientIndex(ttl=300)
+
+    def load(self, rows):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as csvfile:
+            csvfile.write(''.join(f'{name},{unit}\n' for name, unit in rows))
+        call_command('load_data_ingr', path, stdout=StringIO())
+
+    def names(self, query):
+        return [item['name'] for item in self.worker_index.search(query, 10)]
+
+    def test_load_command_invalidates_other_indexes(self):
+        self.assertEqual(self.names('са'), [])
+        self.load((('сахар', 'г'), ('сало', 'г')))
+        self.assertEqual(self.names('са'), ['сало', 'сахар'])
+
+    def test_index_is_reused_without_changes(self):
+        self.assertEqual(self.names('со'), ['соль'])
+        Ingredients.objects.bulk_create(
+            [Ingredients(name='сода', measurement_unit='г')]
+        )
+        self.assertEqual(self.names('со'), ['соль'])
@@ -0,0 +1,86 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F, Sum
+from django.test import TestCase
+
+from recipe.feed import feed_recipe_ids
+from recipe.models import (FeedEntry, Favorite, IngredientsAmount,
+                           PopularRecipe, Recipe, RecipeActivity,
+                           ShoppingCart, SimilarRecipe)
+from users.models import CustomUser, Subscribe
+
+
+class SeedScaleTest(TestCase):
+    """Синтетические данные соблюдают правила API, отчет - число строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        stdout = StringIO()
+        call_command(
+            'seed_scale', seed=1, users=30, recipes=200,
+            batch_size=50, stdout=stdout
+        )
+        cls.reported = dict(
+            (table, int(count)) for table, count in re.findall(
+                r'^(\w+): (\d+)$', stdout.getvalue(), re.MULTILINE
+            )
+        )
+
+    def test_no_own_recipes_in_favorites_and_carts(self):
+        for model in (Favorite, ShoppingCart):
+            links = model.recipe.through.objects
+            container = model.recipe.field.m2m_field_name()
+            self.assertTrue(links.exists())
+            self.assertFalse(
+                links.filter(
+                    recipe__author=F(f'{container}__user')
+                ).exists()
+            )
+        self.assertFalse(Subscribe.objects.filter(user=F('author')).exists())
+
+    def test_reported_counts_match_rows(self):
+        for model in (
+            IngredientsAmount,
+            Favorite.recipe.through,
+            ShoppingCart.recipe.through,
+            Subscribe,
+            FeedEntry,
+            RecipeActivity,
+        ):
+            self.assertEqual(
+                self.reported[model._meta.db_table], model.objects.count()
+            )
+
+    def test_average_links_per_recipe(self):
+        self.assertGreater(self.reported['recipe_ingredientsamount'], 200 * 8)
+
+    def test_cart_totals_match(self):
+        call_command('cart_totals', verify=True, stdout=StringIO())
+
+    def test_activity_matches_counters(self):
+        totals = RecipeActivity.objects.aggregate(
+            favorites=Sum('favorites'), carts=Sum('carts')
+        )
+        self.assertEqual(
+            totals['favorites'], Favorite.recipe.through.objects.count()
+        )
+        self.assertEqual(
+            totals['carts'], ShoppingCart.recipe.through.objects.count()
+        )
+
+    def test_derived_tables_are_built(self):
+        self.assertTrue(PopularRecipe.objects.exists())
+        self.assertTrue(SimilarRecipe.objects.exists())
+
+    def test_feeds_match_subscriptions(self):
+        for user in CustomUser.objects.filter(
+            pk__in=Subscribe.objects.values('user')
+        )[:5]:
+            self.assertEqual(
+                feed_recipe_ids(user, 10),
+                list(Recipe.objects.filter(
+                    author__following__user=user
+                ).order_by('-pk').values_list('pk', flat=True)[:10])
+            )
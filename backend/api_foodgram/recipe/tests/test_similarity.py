@@ -0,0 +1,149 @@
+import random
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+
+from api_foodgram import settings
+from recipe.models import Ingredients, IngredientsAmount, Recipe, SimilarRecipe
+from recipe.similarity import (COMMON_INGREDIENTS_KEY, build_similar_recipes,
+                               common_ingredients, refresh_similar_recipes,
+                               row_blocks)
+from users.models import CustomUser
+
+MAX_DF = 8
+LIMIT = 3
+
+
+class SimilarRecipesTest(TestCase):
+    """
+    Полная перестройка и пересчет одного рецепта дают Жаккара
+    по наборам без частых ингредиентов при любом размере блока.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        Ingredients.objects.bulk_create(
+            Ingredients(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(12)
+        )
+        cls.ingredients = list(Ingredients.objects.order_by('pk'))
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author, name=f'Рецепт {number}',
+                image='recipes/test.png', description='Описание',
+                cooking_time=10
+            )
+            for number in range(30)
+        )
+        cls.recipes = list(Recipe.objects.order_by('pk'))
+        generator = random.Random(0)
+        weights = [1 / rank for rank in range(1, 13)]
+        IngredientsAmount.objects.bulk_create(
+            IngredientsAmount(recipe=recipe, ingredients=ingredient, amount=1)
+            for recipe in cls.recipes
+            for ingredient in set(generator.choices(
+                cls.ingredients, weights=weights, k=generator.randint(1, 6)
+            ))
+        )
+
+    def setUp(self):
+        cache.clear()
+        for name, value in (
+            ('SIMILAR_RECIPES_MAX_DF', MAX_DF),
+            ('SIMILAR_RECIPES_LIMIT', LIMIT),
+        ):
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingredient_sets(self, common=None):
+        sets = {recipe.pk: set() for recipe in self.recipes}
+        for recipe, ingredient in IngredientsAmount.objects.values_list(
+            'recipe', 'ingredients'
+        ):
+            sets[recipe].add(ingredient)
+        frequency = {}
+        for ingredients in sets.values():
+            for ingredient in ingredients:
+                frequency[ingredient] = frequency.get(ingredient, 0) + 1
+        if common is None:
+            common = {
+                ingredient for ingredient, count in frequency.items()
+                if count > MAX_DF
+            }
+        return {pk: ingredients - common for pk, ingredients in sets.items()}
+
+    def expected(self, common=None):
+        sets = self.ingredient_sets(common)
+        result = {}
+        for pk, ingredients in sets.items():
+            scores = []
+            for other, other_ingredients in sets.items():
+                shared = len(ingredients & other_ingredients)
+                if other != pk and shared:
+                    scores.append((
+                        -shared / len(ingredients | other_ingredients), other
+                    ))
+            result[pk] = [
+                (other, round(-score, 6)) for score, other in sorted(scores)
+            ][:LIMIT]
+        return result
+
+    def stored(self, pk):
+        return [
+            (similar, round(score, 6))
+            for similar, score in SimilarRecipe.objects.filter(
+                recipe=pk
+            ).order_by('-score', 'similar').values_list('similar', 'score')
+        ]
+
+    def test_common_ingredients_are_dropped(self):
+        build_similar_recipes()
+        common = cache.get(COMMON_INGREDIENTS_KEY)
+        self.assertTrue(common)
+        cache.clear()
+        self.assertEqual(common_ingredients(), common)
+
+    def test_rebuild_does_not_depend_on_block_size(self):
+        expected = self.expected()
+        for block_nnz in (1, 20, 10 ** 6):
+            build_similar_recipes(block_nnz=block_nnz)
+            for pk, neighbours in expected.items():
+                self.assertEqual(self.stored(pk), neighbours)
+
+    def test_refresh_matches_rebuild(self):
+        build_similar_recipes()
+        recipe = self.recipes[0]
+        IngredientsAmount.objects.filter(recipe=recipe).delete()
+        IngredientsAmount.objects.bulk_create(
+            IngredientsAmount(recipe=recipe, ingredients=ingredient, amount=1)
+            for ingredient in self.ingredients[6:10]
+        )
+        refresh_similar_recipes(recipe.pk)
+        # Частые ингредиенты берутся из кэша последней перестройки.
+        self.assertEqual(
+            self.stored(recipe.pk),
+            self.expected(cache.get(COMMON_INGREDIENTS_KEY))[recipe.pk]
+        )
+
+    def test_refresh_caps_candidates(self):
+        build_similar_recipes()
+        recipe = self.recipes[0]
+        with mock.patch.object(settings, 'SIMILAR_RECIPES_CANDIDATES', 1):
+            refresh_similar_recipes(recipe.pk)
+        self.assertLessEqual(len(self.stored(recipe.pk)), 1)
+
+    def test_row_blocks_respect_budget(self):
+        work = np.array([3, 1, 4, 1, 5, 9, 2, 6])
+        blocks = list(row_blocks(work, 6))
+        self.assertEqual(blocks[0][0], 0)
+        self.assertEqual(blocks[-1][1], len(work))
+        for (_, stop), (start, _) in zip(blocks, blocks[1:]):
+            self.assertEqual(stop, start)
+        for start, stop in blocks:
+            self.assertTrue(stop - start == 1 or work[start:stop].sum() <= 6)
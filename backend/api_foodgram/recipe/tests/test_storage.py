@@ -0,0 +1,64 @@
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipe.models import Recipe
+from recipe.storage import content_storage
+from users.models import CustomUser
+
+DAY = 24 * 60 * 60
+
+
+class ContentStorageGcTest(TestCase):
+    """Повторная загрузка защищает файл от gc_media."""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def save_old(self, content):
+        name = content_storage.save('recipes/image.png', ContentFile(content))
+        old = time.time() - DAY
+        os.utime(content_storage.path(name), (old, old))
+        return name
+
+    def gc(self):
+        call_command('gc_media', stdout=StringIO())
+
+    def test_gc_deletes_old_unreferenced_files(self):
+        name = self.save_old(b'unreferenced')
+        self.gc()
+        self.assertFalse(content_storage.exists(name))
+
+    def test_repeated_upload_refreshes_file(self):
+        name = self.save_old(b'uploaded again')
+        self.assertEqual(
+            content_storage.save(
+                'recipes/other.png', ContentFile(b'uploaded again')
+            ),
+            name
+        )
+        self.gc()
+        self.assertTrue(content_storage.exists(name))
+
+    def test_gc_keeps_referenced_files(self):
+        name = self.save_old(b'referenced')
+        Recipe.objects.create(
+            author=CustomUser.objects.create(
+                username='author', email='author@example.com'
+            ),
+            name='Рецепт',
+            image=name,
+            description='Описание',
+            cooking_time=10
+        )
+        self.gc()
+        self.assertTrue(content_storage.exists(name))
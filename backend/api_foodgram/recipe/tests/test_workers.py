@@ -0,0 +1,25 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api_foodgram import settings
+from recipe import workers
+
+
+def broken_task(recipe_id):
+    raise OSError(f'Изображение рецепта {recipe_id} не найдено.')
+
+
+class InlineTaskTest(SimpleTestCase):
+    """Задача, выполненная в потоке запроса, не роняет ответ."""
+
+    def test_inline_error_is_logged(self):
+        with mock.patch.object(settings, 'BACKGROUND_WORKERS', 0):
+            with self.assertLogs(workers.logger, 'ERROR'):
+                workers.submit(broken_task, 1)
+
+    def test_saturated_queue_error_is_logged(self):
+        with mock.patch.object(workers, 'queue_slots') as queue_slots:
+            queue_slots.acquire.return_value = False
+            with self.assertLogs(workers.logger, 'ERROR'):
+                workers.submit(broken_task, 1)
@@ -0,0 +1,51 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+from django.db import connection, transaction
+
+from api_foodgram import settings
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=max(settings.BACKGROUND_WORKERS, 1),
+    thread_name_prefix='foodgram-worker',
+)
+queue_slots = BoundedSemaphore(settings.BACKGROUND_QUEUE_SIZE)
+
+
+def run_in_background(func, *args):
+    """
+    Запуск func(*args) в локальном пуле потоков после коммита
+    текущей транзакции. Очередь ограничена: если она заполнена
+    или пул выключен (BACKGROUND_WORKERS = 0), задача выполняется
+    сразу в текущем потоке.
+    """
+    transaction.on_commit(lambda: submit(func, *args))
+
+
+def submit(func, *args):
+    if settings.BACKGROUND_WORKERS and queue_slots.acquire(blocking=False):
+        executor.submit(run_task, func, *args)
+        return
+    run_logged(func, *args)
+
+
+def run_logged(func, *args):
+    """
+    Ошибка задачи только пишется в лог: к этому моменту транзакция
+    запроса уже закоммичена, и ответ не должен превращаться в 500.
+    """
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась ошибкой.', func)
+
+
+def run_task(func, *args):
+    try:
+        run_logged(func, *args)
+    finally:
+        queue_slots.release()
+        connection.close()
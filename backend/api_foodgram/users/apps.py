@@ -3,3 +3,20 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from rest_framework.authtoken.models import Token
+
+        from .authentication import drop_cached_token, drop_cached_user_tokens
+        from .models import CustomUser
+        post_delete.connect(
+            drop_cached_token,
+            sender=Token,
+            dispatch_uid='auth_token_cache_delete'
+        )
+        post_save.connect(
+            drop_cached_user_tokens,
+            sender=CustomUser,
+            dispatch_uid='auth_token_cache_user_save'
+        )
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api_foodgram import settings
+
+TOKEN_CACHE_KEY = 'auth_token:{}'
+USER_CACHE_FIELDS = frozenset(('last_login',))
+
+
+def token_cache_key(key):
+    return TOKEN_CACHE_KEY.format(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кэшем token -> user на AUTH_TOKEN_CACHE_TTL
+    секунд: повторные запросы с тем же токеном обходятся без
+    обращения к базе. Кэш сбрасывается сигналами при выходе
+    и при изменении пользователя; другие процессы видят сброс,
+    только если кэш общий (см. CACHES в settings).
+    """
+
+    def authenticate_credentials(self, key):
+        token = cache.get(token_cache_key(key))
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                token_cache_key(key), token, settings.AUTH_TOKEN_CACHE_TTL
+            )
+            return user, token
+        return token.user, token
+
+
+def drop_cached_token(sender, instance, **kwargs):
+    """Токен удален: выход пользователя или удаление аккаунта."""
+    cache.delete(token_cache_key(instance.key))
+
+
+def drop_cached_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Пользователь изменен: пароль, is_active, is_blocked или профиль.
+    Обновление одного last_login при входе кэш не трогает.
+    """
+    if update_fields and USER_CACHE_FIELDS.issuperset(update_fields):
+        return
+    cache.delete_many([
+        token_cache_key(key)
+        for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True
+        )
+    ])
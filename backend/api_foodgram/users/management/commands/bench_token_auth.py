@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, token_cache_key
+from users.models import CustomUser
+
+BENCH_USERNAME = 'bench_token_auth'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare queries and time per authenticate() call of '
+        'TokenAuthentication and CachedTokenAuthentication. '
+        'The temporary user and token are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=20_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = CustomUser.objects.create(
+                username=BENCH_USERNAME,
+                email=f'{BENCH_USERNAME}@example.com'
+            )
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get(
+                '/', HTTP_AUTHORIZATION=f'Token {token.key}'
+            )
+            for authentication in (
+                TokenAuthentication(), CachedTokenAuthentication()
+            ):
+                queries, seconds = self.measure(
+                    authentication, request, options['calls']
+                )
+                self.stdout.write(
+                    f'{type(authentication).__name__}: '
+                    f'{queries / options["calls"]:.2f} queries/call, '
+                    f'{seconds / options["calls"] * 1e6:.1f} us/call'
+                )
+            cache.delete(token_cache_key(token.key))
+            transaction.set_rollback(True)
+
+    def measure(self, authentication, request, calls):
+        """Первый вызов прогревает кэш и в замер не входит."""
+        authentication.authenticate(request)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(calls):
+                authentication.authenticate(request)
+            seconds = time.perf_counter() - start
+        return len(queries), seconds
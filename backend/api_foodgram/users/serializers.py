@@ -3,8 +3,10 @@ from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api_foodgram import settings
 from recipe.models import Recipe
 from .models import CustomUser, Subscribe
+from .utils import get_following_ids
 
 
 class UserSerializer(UserCreateSerializer):
@@ -19,11 +21,10 @@ class UserSerializer(UserCreateSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        request_user = self.context['request'].user
-        return(
-            request_user.is_authenticated
-            and obj.following.filter(user=request_user).exists()
-        )
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return obj.pk in get_following_ids(self.context.get('request'))
 
     def create(self, validated_data):
         user = CustomUser(
@@ -46,10 +47,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
     last_name = serializers.ReadOnlyField(source='author.last_name')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='author.recipe.count',
-        read_only=True
-    )
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
@@ -59,23 +57,34 @@ class SubscribeSerializer(serializers.ModelSerializer):
         model = Subscribe
 
     def get_is_subscribed(self, obj):
-        request_user = self.context.get('request').user
-        presence = Subscribe.objects.filter(
-            author=obj.author,
-            user=request_user).exists()
-        return(
-            request_user.is_authenticated
-            and presence
-        )
+        request = self.context.get('request')
+        if request is not None and obj.user_id == request.user.pk:
+            return True
+        return obj.author_id in get_following_ids(request)
 
     def get_recipes(self, obj):
+        """
+        Последние рецепты автора: в списке подписок они уже
+        подгружены одним запросом в latest_recipes.
+        """
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = obj.author.recipe.order_by('-pk')[:self.context.get(
+                'recipes_limit', settings.SUBSCRIPTION_RECIPES_LIMIT
+            )]
         recipes = RecipeFavoriteSerializer(
-            obj.author.recipe.all()[:3],
+            recipes,
             many=True,
             read_only=True
         )
         return recipes.data
 
+    def get_recipes_count(self, obj):
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is not None:
+            return recipes_count
+        return obj.author.recipe.count()
+
 
 class UsersCreateSerializer(DjoserUserSerializer):
     """
@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from users.authentication import CachedTokenAuthentication
+from users.models import CustomUser
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """Кэш токенов: запросы к базе и сброс кэша в этом процессе."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create(
+            username='user', email='user@example.com'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.token = Token.objects.create(user=self.user)
+        self.request = APIRequestFactory().get(
+            '/', HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+
+    def queries(self, authentication, calls=10):
+        authentication.authenticate(self.request)
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(calls):
+                self.assertEqual(
+                    authentication.authenticate(self.request)[0], self.user
+                )
+        return len(queries)
+
+    def test_cached_lookup_skips_database(self):
+        self.assertEqual(self.queries(TokenAuthentication()), 10)
+        self.assertEqual(self.queries(CachedTokenAuthentication()), 0)
+
+    def test_token_delete_drops_cache(self):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate(self.request)
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+    def test_user_change_drops_cache(self):
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate(self.request)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+    def test_bench_command(self):
+        stdout = StringIO()
+        call_command('bench_token_auth', calls=10, stdout=stdout)
+        self.assertIn('CachedTokenAuthentication: 0.00 queries/call',
+                      stdout.getvalue())
+        self.assertFalse(
+            CustomUser.objects.filter(username='bench_token_auth').exists()
+        )
@@ -0,0 +1,52 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import FoodgramAPITestCase, create_user
+from users.models import Subscribe
+
+USERS_URL = '/api/users/'
+
+
+class FollowingIdsTest(FoodgramAPITestCase):
+    """
+    is_subscribed в списке пользователей берется из подписок,
+    загруженных одним запросом на весь запрос.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.authors = [create_user(f'author{number}') for number in range(6)]
+        cls.following = {author.pk for author in cls.authors[::2]}
+        Subscribe.objects.bulk_create(
+            Subscribe(user=cls.reader, author_id=pk) for pk in cls.following
+        )
+
+    def subscribe_queries(self, limit):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(USERS_URL, {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql'] for query in captured
+            if Subscribe._meta.db_table in query['sql']
+        ]
+        return response.data['results'], queries
+
+    def test_one_query_for_any_page_size(self):
+        self.login(self.reader)
+        for limit in (1, len(self.authors) + 1):
+            _, queries = self.subscribe_queries(limit)
+            self.assertEqual(len(queries), 1)
+
+    def test_is_subscribed(self):
+        self.login(self.reader)
+        users, _ = self.subscribe_queries(len(self.authors) + 1)
+        for user in users:
+            self.assertEqual(
+                user['is_subscribed'], user['id'] in self.following
+            )
+
+    def test_anonymous_does_not_query_subscriptions(self):
+        users, queries = self.subscribe_queries(len(self.authors) + 1)
+        self.assertEqual(queries, [])
+        self.assertFalse(any(user['is_subscribed'] for user in users))
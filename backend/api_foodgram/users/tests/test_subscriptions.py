@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import FoodgramAPITestCase, create_recipe, create_user
+from api_foodgram import settings
+from users.models import Subscribe
+
+SUBSCRIPTIONS_URL = '/api/users/subscriptions/'
+
+
+class SubscriptionRecipesLimitTest(FoodgramAPITestCase):
+    """
+    ?recipes_limit= режет рецепты каждого автора до последних N,
+    recipes_count считает все, число запросов не растет со страницей.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        cls.authors = [create_user(f'author{number}') for number in range(4)]
+        cls.recipes = {author.pk: [] for author in cls.authors}
+        for number in range(9):
+            author = cls.authors[number % 3]
+            cls.recipes[author.pk].append(create_recipe(author, number).pk)
+        Subscribe.objects.bulk_create(
+            Subscribe(user=cls.reader, author=author)
+            for author in cls.authors
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.login(self.reader)
+
+    def subscriptions(self, params):
+        response = self.client.get(SUBSCRIPTIONS_URL, params)
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item for item in response.data['results']}
+
+    def test_latest_recipes_per_author(self):
+        for author_pk, item in self.subscriptions(
+            {'recipes_limit': 2}
+        ).items():
+            self.assertEqual(
+                [recipe['id'] for recipe in item['recipes']],
+                sorted(self.recipes[author_pk], reverse=True)[:2]
+            )
+            self.assertEqual(
+                item['recipes_count'], len(self.recipes[author_pk])
+            )
+
+    def test_default_limit(self):
+        for item in self.subscriptions({}).values():
+            self.assertLessEqual(
+                len(item['recipes']), settings.SUBSCRIPTION_RECIPES_LIMIT
+            )
+            self.assertTrue(item['is_subscribed'])
+
+    def test_bad_recipes_limit(self):
+        for value in ('a', '-1'):
+            response = self.client.get(
+                SUBSCRIPTIONS_URL, {'recipes_limit': value}
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Ошибка', response.data)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        self.client.get(SUBSCRIPTIONS_URL)
+        queries = []
+        for limit in (1, len(self.authors)):
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(
+                    SUBSCRIPTIONS_URL, {'limit': limit, 'recipes_limit': 2}
+                )
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
@@ -0,0 +1,27 @@
+from .models import Subscribe
+
+FOLLOWING_IDS_ATTR = '_following_ids'
+
+
+def get_following_ids(request):
+    """
+    Id авторов, на которых подписан пользователь запроса.
+    Загружаются одним запросом и живут до конца запроса.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    following_ids = getattr(request, FOLLOWING_IDS_ATTR, None)
+    if following_ids is None:
+        following_ids = frozenset(
+            Subscribe.objects.filter(user=request.user).values_list(
+                'author', flat=True
+            )
+        )
+        setattr(request, FOLLOWING_IDS_ATTR, following_ids)
+    return following_ids
+
+
+def reset_following_ids(request):
+    """Сброс кэша подписок после подписки или отписки."""
+    if hasattr(request, FOLLOWING_IDS_ATTR):
+        delattr(request, FOLLOWING_IDS_ATTR)
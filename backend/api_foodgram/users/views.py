@@ -1,3 +1,5 @@
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
@@ -7,11 +9,17 @@ from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from api.pagination import LimitPageNumberPagination
+from api.pagination import (LimitPageNumberPagination,
+                            LimitPageOrCursorPagination)
+from api_foodgram import settings
+from recipe.feed import backfill_feed, clear_feed
+from recipe.models import Recipe
 from .models import CustomUser, Subscribe
 from .serializers import SubscribeSerializer
+from .utils import reset_following_ids
 
 SUB_ERROR = 'Вы уже подписаны или пытаетесь подписаться на самого себя'
+RECIPES_LIMIT_PARAM = 'recipes_limit'
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -69,6 +77,8 @@ class UserViewSet(DjoserUserViewSet):
                 author=author,
                 user=request.user
             )
+            backfill_feed(request.user.pk, author.pk)
+            reset_following_ids(request)
             serializer = SubscribeSerializer(
                 new_subscribe, context={'request': request}
             )
@@ -80,6 +90,8 @@ class UserViewSet(DjoserUserViewSet):
             )
             if our_subscribe:
                 our_subscribe.delete()
+                clear_feed(request.user.pk, author.pk)
+                reset_following_ids(request)
                 return Response(
                     {"Оповещение": "Пользователь удален из подписок!"},
                     status=status.HTTP_204_NO_CONTENT
@@ -92,10 +104,65 @@ class UserViewSet(DjoserUserViewSet):
 
 
 class SubscriptionsList(ListAPIView):
-    """Список подписчиков."""
+    """
+    Список подписчиков за постоянное число запросов:
+    авторы через select_related, число рецептов аннотацией,
+    последние ?recipes_limit= рецептов одним запросом на страницу.
+    """
     serializer_class = SubscribeSerializer
     permission_classes = (IsAuthenticated,)
-    pagination_class = LimitPageNumberPagination
+    pagination_class = LimitPageOrCursorPagination
+    recipes_limit = settings.SUBSCRIPTION_RECIPES_LIMIT
 
     def get_queryset(self):
-        return self.request.user.follower.all()
+        return self.request.user.follower.select_related('author').annotate(
+            recipes_count=Count('author__recipe')
+        ).order_by('-pk')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recipes_limit'] = self.recipes_limit
+        return context
+
+    def list(self, request, *args, **kwargs):
+        recipes_limit = request.query_params.get(RECIPES_LIMIT_PARAM)
+        if recipes_limit is not None:
+            if not recipes_limit.isdigit():
+                return Response(
+                    {"Ошибка": "recipes_limit должен быть целым числом!"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            self.recipes_limit = int(recipes_limit)
+        return super().list(request, *args, **kwargs)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            attach_latest_recipes(page, self.recipes_limit)
+        return page
+
+
+def attach_latest_recipes(subscriptions, limit):
+    """
+    Последние limit рецептов каждого автора одним запросом:
+    ROW_NUMBER() по автору во вложенном запросе, снаружи
+    отсекаются строки с номером больше limit.
+    """
+    grouped = {subscription.author_id: [] for subscription in subscriptions}
+    if grouped and limit:
+        ranked = Recipe.objects.filter(author__in=grouped).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author')],
+                order_by=F('pk').desc()
+            )
+        ).only('pk', 'author', 'name', 'image', 'cooking_time')
+        sql, params = ranked.query.sql_with_params()
+        for recipe in Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+            f'ORDER BY author_id, row_number',
+            (*params, limit)
+        ):
+            grouped[recipe.author_id].append(recipe)
+    for subscription in subscriptions:
+        subscription.latest_recipes = grouped[subscription.author_id]